@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-14 16:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_webhook_event_data_storage'),
+        ('authentication', '0003_alter_userrole_permissions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='users', to='companies.company'),
+        ),
+    ]
@@ -21,7 +21,9 @@ class CustomUser(AbstractUser):
     email_verified = models.BooleanField(default=False)
     phone_verified = models.BooleanField(default=False)
     onboarding_completed = models.BooleanField(default=False)
-    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, null=True, blank=True)
+    company = models.ForeignKey(
+        'companies.Company', on_delete=models.CASCADE, null=True, blank=True, related_name='users'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import BooleanField, Case, F, Value, When
 import uuid
 from decimal import Decimal
 
@@ -77,6 +78,23 @@ class Invoice(models.Model):
     def __str__(self):
         return f"{self.invoice_number} - {self.company.name}"
 
+class UsageMetricsQuerySet(models.QuerySet):
+    def with_limit_flags(self):
+        """Annotate over_conversation_limit/over_ai_request_limit against the company's plan"""
+        plan = 'company__subscription__plan__'
+        return self.annotate(
+            over_conversation_limit=Case(
+                When(conversations_count__gte=F(plan + 'max_conversations_per_month'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            over_ai_request_limit=Case(
+                When(ai_requests_count__gte=F(plan + 'max_ai_requests_per_month'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+
 class UsageMetrics(models.Model):
     """Track usage for billing purposes"""
     company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='usage_metrics')
@@ -86,6 +104,8 @@ class UsageMetrics(models.Model):
     ai_requests_count = models.IntegerField(default=0)
     storage_used_mb = models.FloatField(default=0.0)
 
+    objects = UsageMetricsQuerySet.as_manager()
+
     class Meta:
         unique_together = ['company', 'date']
 
@@ -14,6 +14,33 @@ from messaging.models import Conversation, Message
 
 User = get_user_model()
 
+PLAN_DEFAULTS = {
+    "name": "Professional Plan",
+    "plan_type": "professional",
+    "description": "Test plan",
+    "price_monthly": Decimal('99.99'),
+    "price_yearly": Decimal('999.99'),
+    "max_users": 25,
+    "max_conversations_per_month": 10000,
+    "max_ai_requests_per_month": 50000,
+}
+
+BASIC_PLAN = {
+    "name": "Basic Plan",
+    "plan_type": "starter",
+    "description": "Basic plan",
+    "price_monthly": Decimal('29.99'),
+    "price_yearly": Decimal('299.99'),
+    "max_users": 5,
+    "max_conversations_per_month": 1000,
+    "max_ai_requests_per_month": 5000,
+}
+
+
+def make_plan(**overrides):
+    """Build an unsaved plan; pass a list of these to bulk_create for one INSERT"""
+    return SubscriptionPlan(**{**PLAN_DEFAULTS, **overrides})
+
 
 class SubscriptionPlanModelTest(TestCase):
     """Test SubscriptionPlan model functionality"""
@@ -125,22 +152,14 @@ class SubscriptionPlanModelTest(TestCase):
 class SubscriptionModelTest(TestCase):
     """Test Subscription model functionality"""
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.plan = SubscriptionPlan.objects.create(
-            name="Professional Plan",
-            plan_type="professional",
-            description="Test plan",
-            price_monthly=Decimal('99.99'),
-            price_yearly=Decimal('999.99'),
-            max_users=25,
-            max_conversations_per_month=10000,
-            max_ai_requests_per_month=50000
-        )
+        cls.plan = SubscriptionPlan.objects.create(**PLAN_DEFAULTS)
 
     def test_create_subscription(self):
         """Test creating a subscription"""
@@ -238,25 +257,17 @@ class SubscriptionModelTest(TestCase):
 class InvoiceModelTest(TestCase):
     """Test Invoice model functionality"""
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.plan = SubscriptionPlan.objects.create(
-            name="Professional Plan",
-            plan_type="professional",
-            description="Test plan",
-            price_monthly=Decimal('99.99'),
-            price_yearly=Decimal('999.99'),
-            max_users=25,
-            max_conversations_per_month=10000,
-            max_ai_requests_per_month=50000
-        )
-        self.subscription = Subscription.objects.create(
-            company=self.company,
-            plan=self.plan,
+        cls.plan = SubscriptionPlan.objects.create(**PLAN_DEFAULTS)
+        cls.subscription = Subscription.objects.create(
+            company=cls.company,
+            plan=cls.plan,
             started_at=timezone.now(),
             current_period_start=timezone.now(),
             current_period_end=timezone.now() + timedelta(days=30)
@@ -482,37 +493,23 @@ class UsageMetricsModelTest(TestCase):
 class BillingServiceTest(TestCase):
     """Test billing service functionality"""
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.plan = SubscriptionPlan.objects.create(
-            name="Professional Plan",
-            plan_type="professional",
-            description="Test plan",
-            price_monthly=Decimal('99.99'),
-            price_yearly=Decimal('999.99'),
-            max_users=25,
-            max_conversations_per_month=10000,
-            max_ai_requests_per_month=50000
-        )
+        cls.plan, cls.basic_plan = SubscriptionPlan.objects.bulk_create([
+            make_plan(),
+            make_plan(**BASIC_PLAN),
+        ])
 
     def test_subscription_upgrade(self):
         """Test subscription plan upgrade"""
         # Start with basic subscription
-        basic_plan = SubscriptionPlan.objects.create(
-            name="Basic Plan",
-            plan_type="starter",
-            description="Basic plan",
-            price_monthly=Decimal('29.99'),
-            price_yearly=Decimal('299.99'),
-            max_users=5,
-            max_conversations_per_month=1000,
-            max_ai_requests_per_month=5000
-        )
-        
+        basic_plan = self.basic_plan
+
         subscription = Subscription.objects.create(
             company=self.company,
             plan=basic_plan,
@@ -546,23 +543,16 @@ class BillingServiceTest(TestCase):
             ai_requests_count=45000    # Close to limit of 50000
         )
         
-        # Check if within limits
-        conversations_within_limit = current_usage.conversations_count < self.plan.max_conversations_per_month
-        ai_requests_within_limit = current_usage.ai_requests_count < self.plan.max_ai_requests_per_month
-        
-        self.assertTrue(conversations_within_limit)
-        self.assertTrue(ai_requests_within_limit)
+        # Limits are compared against the plan in the same query
+        usage = UsageMetrics.objects.filter(pk=current_usage.pk).with_limit_flags()
+        limits = usage.values('over_conversation_limit', 'over_ai_request_limit')
+
+        self.assertEqual(limits.get(), {'over_conversation_limit': False, 'over_ai_request_limit': False})
         
         # Test exceeding limits
-        current_usage.conversations_count = 11000
-        current_usage.ai_requests_count = 55000
-        current_usage.save()
-        
-        conversations_within_limit = current_usage.conversations_count < self.plan.max_conversations_per_month
-        ai_requests_within_limit = current_usage.ai_requests_count < self.plan.max_ai_requests_per_month
-        
-        self.assertFalse(conversations_within_limit)
-        self.assertFalse(ai_requests_within_limit)
+        usage.update(conversations_count=11000, ai_requests_count=55000)
+
+        self.assertEqual(limits.get(), {'over_conversation_limit': True, 'over_ai_request_limit': True})
 
     def test_monthly_billing_cycle(self):
         """Test monthly billing cycle"""
@@ -668,17 +658,8 @@ class BillingServiceTest(TestCase):
     def test_proration_calculation(self):
         """Test proration calculation for mid-cycle upgrades"""
         # Current plan
-        basic_plan = SubscriptionPlan.objects.create(
-            name="Basic Plan",
-            plan_type="starter",
-            description="Basic plan",
-            price_monthly=Decimal('29.99'),
-            price_yearly=Decimal('299.99'),
-            max_users=5,
-            max_conversations_per_month=1000,
-            max_ai_requests_per_month=5000
-        )
-        
+        basic_plan = self.basic_plan
+
         # Start subscription 15 days ago
         start_date = timezone.now() - timedelta(days=15)
         end_date = start_date + timedelta(days=30)
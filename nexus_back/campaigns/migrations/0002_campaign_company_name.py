@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-14 16:08
+
+from django.db import migrations, models
+
+
+def populate_company_name(apps, schema_editor):
+    Campaign = apps.get_model('campaigns', 'Campaign')
+    Company = apps.get_model('companies', 'Company')
+    Campaign.objects.update(
+        company_name=models.Subquery(
+            Company.objects.filter(pk=models.OuterRef('company_id')).values('name')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='company_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(populate_company_name, migrations.RunPython.noop),
+    ]
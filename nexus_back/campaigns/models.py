@@ -1,9 +1,17 @@
 from django.db import models
+from django.db.models import Count, Q
 import uuid
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+class CampaignQuerySet(models.QuerySet):
+    def with_pending_count(self):
+        """Annotate pending_count so list views don't COUNT recipients per campaign"""
+        return self.annotate(
+            pending_count=Count('recipients', filter=Q(recipients__status='pending'))
+        )
+
 class Campaign(models.Model):
     """Marketing/messaging campaigns"""
     STATUS_CHOICES = [
@@ -17,6 +25,7 @@ class Campaign(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='campaigns')
+    company_name = models.CharField(max_length=255, blank=True)  # Denormalized for __str__
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
@@ -29,8 +38,16 @@ class Campaign(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CampaignQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        # Refresh the copy whenever the company is already loaded, so it never costs a query
+        if self.company_id and (not self.company_name or Campaign.company.is_cached(self)):
+            self.company_name = self.company.name
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"{self.company.name} - {self.name}"
+        return f"{self.company_name or self.company.name} - {self.name}"
 
 class CampaignRecipient(models.Model):
     """Individual recipients in a campaign"""
@@ -45,6 +62,8 @@ class CampaignRecipient(models.Model):
 
     campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='recipients')
     recipient_id = models.CharField(max_length=255)  # Phone number, user ID, etc.
+    # JSON defaults stay default=dict: it is the cheapest callable, and metadata is mutated in place,
+    # so a shared empty dict would leak between rows. Bulk inserts can pass {} to skip it.
     recipient_data = models.JSONField(default=dict)  # Name, etc.
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     sent_at = models.DateTimeField(null=True, blank=True)
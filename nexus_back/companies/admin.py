@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
@@ -16,6 +17,7 @@ class CompanyAdmin(admin.ModelAdmin):
     search_fields = ['name', 'slug', 'email', 'domain']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['id', 'created_at', 'updated_at', 'user_count']
+    list_select_related = ()
     
     fieldsets = (
         ('Basic Information', {
@@ -43,7 +45,7 @@ class CompanyAdmin(admin.ModelAdmin):
     )
 
     def user_count(self, obj):
-        count = obj.users.count()
+        count = obj._user_count
         url = reverse('admin:authentication_customuser_changelist')
         return format_html(
             '<a href="{}?company__id={}">{} users</a>',
@@ -52,7 +54,9 @@ class CompanyAdmin(admin.ModelAdmin):
     user_count.short_description = 'Users'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('users')
+        return super().get_queryset(request).annotate(
+            _user_count=Count('users')
+        )
 
 
 @admin.register(CompanySettings)
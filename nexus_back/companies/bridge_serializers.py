@@ -3,12 +3,15 @@ Bridge Configuration Serializers - B2B Multi-tenant Bridge Setup
 """
 from rest_framework import serializers
 from companies.models import CompanyBridgeConfiguration, CompanyBridgeWebhook
+from nexus_back.serializers import CachedFieldsMixin
 
 
-class CompanyBridgeConfigurationSerializer(serializers.ModelSerializer):
+class CompanyBridgeConfigurationSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Serializer for bridge configuration"""
-    platform_display = serializers.CharField(source='get_platform_display', read_only=True)
-    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    # Method fields instead of source='get_..._display': DRF inspects the signature
+    # of callable sources on every row, which dominated list serialization
+    platform_display = serializers.SerializerMethodField()
+    status_display = serializers.SerializerMethodField()
     setup_instructions = serializers.SerializerMethodField()
 
     class Meta:
@@ -26,6 +29,12 @@ class CompanyBridgeConfigurationSerializer(serializers.ModelSerializer):
             'id', 'last_sync_at', 'setup_completed_at', 'created_at', 'updated_at'
         ]
 
+    def get_platform_display(self, obj):
+        return obj.get_platform_display()
+
+    def get_status_display(self, obj):
+        return obj.get_status_display()
+
     def get_setup_instructions(self, obj):
         """Get setup instructions for the platform"""
         return obj.get_setup_instructions()
@@ -80,7 +89,7 @@ class BridgeTestSerializer(serializers.Serializer):
     )
 
 
-class BridgeWebhookEventSerializer(serializers.ModelSerializer):
+class BridgeWebhookEventSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Serializer for bridge webhook events"""
     
     class Meta:
@@ -8,7 +8,16 @@ from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.conf import settings
 from django.utils import timezone
+from django.db.models import Prefetch
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
 import logging
+import queue
+import socket
+
+import requests
+from requests.adapters import HTTPAdapter
 
 from companies.models import Company, CompanyBridgeConfiguration, CompanyBridgeWebhook
 from matrix_integration.services.matrix_bridge_service import matrix_service
@@ -20,6 +29,124 @@ from .bridge_serializers import (
 
 logger = logging.getLogger(__name__)
 
+_VALID_PLATFORMS = frozenset(code for code, _ in CompanyBridgeConfiguration.PLATFORM_CHOICES)
+
+# platforms() entry for each platform the company hasn't configured, built once
+_UNCONFIGURED_PLATFORMS = tuple(
+    {
+        'code': code,
+        'name': name,
+        'status': 'not_configured',
+        'configured': False,
+        'last_sync': None,
+        'setup_completed': None,
+        'config_id': None
+    }
+    for code, name in CompanyBridgeConfiguration.PLATFORM_CHOICES
+)
+
+# Model field <- configure payload key, per platform
+_PLATFORM_FIELDS = {
+    'whatsapp': (
+        ('whatsapp_phone_number_id', 'phone_number_id'),
+        ('whatsapp_business_account_id', 'business_account_id'),
+    ),
+    'telegram': (('telegram_bot_username', 'bot_username'),),
+    'instagram': (('instagram_page_id', 'page_id'),),
+    'facebook': (('facebook_page_id', 'page_id'),),
+}
+
+# Looked up by name so the testers stay overridable (and patchable)
+_CONNECTION_TESTERS = {
+    'whatsapp': '_test_whatsapp_connection',
+    'telegram': '_test_telegram_connection',
+    'instagram': '_test_instagram_connection',
+    'facebook': '_test_facebook_connection',
+    'signal': '_test_signal_connection',
+}
+
+# Platform API endpoints, formatted once at import
+_graph_url = 'https://graph.facebook.com/v18.0/{}'.format
+_telegram_get_me_url = 'https://api.telegram.org/bot{}/getMe'.format
+_bearer = 'Bearer {}'.format
+
+# Shared keep-alive session so repeated checks skip the TLS handshake
+_HTTP_TIMEOUT = 10
+_http = requests.Session()
+_http.headers['User-Agent'] = 'nexus-bridge/1'
+_http.mount('https://', HTTPAdapter(pool_maxsize=32))
+
+def _set_status(config, **fields):
+    """Write status-only transitions with a single UPDATE, keeping the instance in sync"""
+    fields['updated_at'] = timezone.now()
+    CompanyBridgeConfiguration.objects.filter(pk=config.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(config, name, value)
+
+
+# Idle connections to the signal-cli daemon, reused across requests
+_signal_connections = queue.LifoQueue(maxsize=4)
+_signal_request_ids = itertools.count(1)
+
+
+def _signal_connect(timeout):
+    """Open a fresh connection to the signal-cli daemon socket"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(settings.SIGNAL_CLI_SOCKET)
+    return sock, sock.makefile('rb')
+
+
+def _signal_exchange(sock, reader, request, request_id):
+    """Send one request line and read until its reply, closing the socket on failure"""
+    try:
+        sock.sendall(request)
+        # The daemon also pushes notifications, skip until our reply
+        while True:
+            line = reader.readline()
+            if not line:
+                raise ConnectionError('signal-cli daemon closed the connection')
+            reply = json.loads(line)
+            if reply.get('id') == request_id:
+                return reply
+    except Exception:
+        reader.close()
+        sock.close()
+        raise
+
+
+def _signal_rpc(method, params, timeout=5):
+    """Call the signal-cli daemon over its JSON-RPC UNIX socket"""
+    request_id = next(_signal_request_ids)
+    request = json.dumps({
+        'jsonrpc': '2.0',
+        'method': method,
+        'params': params,
+        'id': request_id,
+    }).encode() + b'\n'
+
+    reply = None
+    try:
+        sock, reader = _signal_connections.get_nowait()
+    except queue.Empty:
+        pass
+    else:
+        try:
+            reply = _signal_exchange(sock, reader, request, request_id)
+        except ConnectionError:
+            # A pooled socket goes stale when the daemon restarts, retry once on a fresh one
+            logger.debug('Pooled signal-cli connection failed, reconnecting')
+    if reply is None:
+        sock, reader = _signal_connect(timeout)
+        reply = _signal_exchange(sock, reader, request, request_id)
+
+    try:
+        _signal_connections.put_nowait((sock, reader))
+    except queue.Full:
+        reader.close()
+        sock.close()
+    return reply
+
 
 class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
     """ViewSet for managing company bridge configurations"""
@@ -28,7 +155,20 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter to only company's own bridge configurations"""
-        return CompanyBridgeConfiguration.objects.filter(company=self.request.user.company)
+        queryset = CompanyBridgeConfiguration.objects.filter(
+            company=self.request.user.company
+        )
+        # The serializer never reads the encrypted blob
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.defer('encrypted_config')
+        # Only the status view reads webhook events
+        elif self.action == 'status':
+            # The events' parent config is already loaded, skip the default join
+            recent_events = CompanyBridgeWebhook.objects.select_related(None).order_by('-created_at')
+            queryset = queryset.prefetch_related(
+                Prefetch('webhook_events', queryset=recent_events[:10], to_attr='recent_events')
+            )
+        return queryset
 
     def perform_create(self, serializer):
         """Automatically set the company when creating a new bridge config"""
@@ -40,38 +180,33 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
         company = request.user.company
         platforms = []
         
-        for platform_code, platform_name in CompanyBridgeConfiguration.PLATFORM_CHOICES:
-            try:
-                config = CompanyBridgeConfiguration.objects.get(
-                    company=company, 
-                    platform=platform_code
-                )
-                platform_info = {
-                    'code': platform_code,
-                    'name': platform_name,
-                    'status': config.status,
-                    'configured': True,
-                    'last_sync': config.last_sync_at.isoformat() if config.last_sync_at else None,
-                    'setup_completed': config.setup_completed_at.isoformat() if config.setup_completed_at else None,
-                    'config_id': str(config.id)
-                }
-            except CompanyBridgeConfiguration.DoesNotExist:
-                platform_info = {
-                    'code': platform_code,
-                    'name': platform_name,
-                    'status': 'not_configured',
-                    'configured': False,
-                    'last_sync': None,
-                    'setup_completed': None,
-                    'config_id': None
-                }
+        # One query for all of the company's configs instead of one per platform
+        configs = {
+            config['platform']: config
+            for config in CompanyBridgeConfiguration.objects.filter(company=company).values(
+                'id', 'platform', 'status', 'last_sync_at', 'setup_completed_at'
+            )
+        }
+        
+        for unconfigured in _UNCONFIGURED_PLATFORMS:
+            config = configs.get(unconfigured['code'])
+            if config is None:
+                platforms.append(unconfigured)
+                continue
             
-            platforms.append(platform_info)
+            platforms.append({
+                **unconfigured,
+                'status': config['status'],
+                'configured': True,
+                'last_sync': config['last_sync_at'],
+                'setup_completed': config['setup_completed_at'],
+                'config_id': config['id']
+            })
         
         return Response({
             'platforms': platforms,
             'company': {
-                'id': str(company.id),
+                'id': company.id,
                 'name': company.name,
                 'plan': company.plan
             }
@@ -88,7 +223,7 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if platform not in dict(CompanyBridgeConfiguration.PLATFORM_CHOICES):
+        if platform not in _VALID_PLATFORMS:
             return Response(
                 {'error': 'Invalid platform'}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -118,7 +253,7 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
         
         return Response({
             'status': 'setup_initialized',
-            'config_id': str(config.id),
+            'config_id': config.id,
             'platform': platform,
             'instructions': instructions,
             'next_step': 'configure'
@@ -139,19 +274,15 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
             config.set_encrypted_config(config_data)
             
             # Update platform-specific fields
-            if config.platform == 'whatsapp':
-                config.whatsapp_phone_number_id = config_data.get('phone_number_id')
-                config.whatsapp_business_account_id = config_data.get('business_account_id')
-            elif config.platform == 'telegram':
-                config.telegram_bot_username = config_data.get('bot_username')
-            elif config.platform == 'instagram':
-                config.instagram_page_id = config_data.get('page_id')
-            elif config.platform == 'facebook':
-                config.facebook_page_id = config_data.get('page_id')
+            for field, key in _PLATFORM_FIELDS.get(config.platform, ()):
+                setattr(config, field, config_data.get(key))
             
             config.status = 'configured'
             config.error_message = None
-            config.save()
+            config.save(update_fields=[
+                'encrypted_config', 'status', 'error_message', 'updated_at',
+                *(field for field, _ in _PLATFORM_FIELDS.get(config.platform, ()))
+            ])
             
             logger.info(f"Bridge configured for {config.company.name} - {config.platform}")
             
@@ -163,9 +294,7 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
             
         except Exception as e:
             logger.error(f"Error configuring bridge {config.id}: {e}")
-            config.status = 'error'
-            config.error_message = str(e)
-            config.save()
+            _set_status(config, status='error', error_message=str(e))
             
             return Response(
                 {'error': f'Failed to configure bridge: {str(e)}'}, 
@@ -192,13 +321,15 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
                 config.setup_completed_at = timezone.now()
                 config.last_sync_at = timezone.now()
                 config.error_message = None
-                config.save()
+                config.save(update_fields=[
+                    'status', 'setup_completed_at', 'last_sync_at', 'error_message', 'updated_at'
+                ])
                 
                 # Initialize Matrix bridge for this company/platform
                 matrix_service.initialize_company_bridge(
-                    company_id=str(config.company.id),
+                    company_id=str(config.company_id),
                     platform=config.platform,
-                    config_data=config.get_decrypted_config()
+                    config_data=config.decrypted_config
                 )
                 
                 return Response({
@@ -207,9 +338,10 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
                     'test_result': test_result
                 })
             else:
-                config.status = 'error'
-                config.error_message = test_result.get('error', 'Test failed')
-                config.save()
+                _set_status(
+                    config, status='error',
+                    error_message=test_result.get('error', 'Test failed')
+                )
                 
                 return Response({
                     'status': 'error',
@@ -219,15 +351,44 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
                 
         except Exception as e:
             logger.error(f"Error testing bridge {config.id}: {e}")
-            config.status = 'error'
-            config.error_message = str(e)
-            config.save()
+            _set_status(config, status='error', error_message=str(e))
             
             return Response(
                 {'error': f'Failed to test bridge: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'])
+    def test_all(self, request):
+        """Test every bridge of the company concurrently (read-only)"""
+        serializer = BridgeTestSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        test_data = serializer.validated_data
+        configs = list(
+            CompanyBridgeConfiguration.objects.filter(
+                company=request.user.company
+            ).select_related(None).only('id', 'platform', 'encrypted_config')
+        )
+        if not configs:
+            return Response({'results': []})
+
+        # Each check is a remote round-trip, so run them side by side
+        with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+            results = list(executor.map(
+                lambda config: self._test_bridge_connection(config, test_data),
+                configs
+            ))
+
+        return Response({
+            'results': [
+                {'id': config.id, 'platform': config.platform, **result}
+                for config, result in zip(configs, results)
+            ]
+        })
+
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         """Activate a configured bridge"""
@@ -242,15 +403,17 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
         try:
             # Initialize Matrix bridge
             matrix_service.initialize_company_bridge(
-                company_id=str(config.company.id),
+                company_id=str(config.company_id),
                 platform=config.platform,
-                config_data=config.get_decrypted_config()
+                config_data=config.decrypted_config
             )
             
             config.status = 'active'
             config.setup_completed_at = timezone.now()
             config.last_sync_at = timezone.now()
-            config.save()
+            config.save(update_fields=[
+                'status', 'setup_completed_at', 'last_sync_at', 'updated_at'
+            ])
             
             return Response({
                 'status': 'active',
@@ -269,8 +432,7 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
         """Deactivate a bridge"""
         config = self.get_object()
         
-        config.status = 'inactive'
-        config.save()
+        _set_status(config, status='inactive')
         
         return Response({
             'status': 'inactive',
@@ -282,26 +444,22 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
         """Get detailed status of a bridge"""
         config = self.get_object()
         
-        # Get recent webhook events
-        recent_events = CompanyBridgeWebhook.objects.filter(
-            bridge_config=config
-        ).order_by('-created_at')[:10]
-        
+        # Recent webhook events are prefetched by get_queryset()
         webhook_events = []
-        for event in recent_events:
+        for event in config.recent_events:
             webhook_events.append({
                 'type': event.event_type,
                 'processed': event.processed,
-                'created_at': event.created_at.isoformat(),
+                'created_at': event.created_at,
                 'error': event.processing_error
             })
         
         return Response({
-            'id': str(config.id),
+            'id': config.id,
             'platform': config.platform,
             'status': config.status,
-            'last_sync': config.last_sync_at.isoformat() if config.last_sync_at else None,
-            'setup_completed': config.setup_completed_at.isoformat() if config.setup_completed_at else None,
+            'last_sync': config.last_sync_at,
+            'setup_completed': config.setup_completed_at,
             'error_message': config.error_message,
             'recent_events': webhook_events,
             'matrix_namespace': config.matrix_namespace,
@@ -311,29 +469,19 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
     def _test_bridge_connection(self, config, test_data):
         """Test platform-specific bridge connection"""
         platform = config.platform
-        config_data = config.get_decrypted_config()
+        config_data = config.decrypted_config
+        
+        tester = _CONNECTION_TESTERS.get(platform)
+        if tester is None:
+            return {'success': False, 'error': 'Unsupported platform'}
         
         try:
-            if platform == 'whatsapp':
-                return self._test_whatsapp_connection(config_data, test_data)
-            elif platform == 'telegram':
-                return self._test_telegram_connection(config_data, test_data)
-            elif platform == 'instagram':
-                return self._test_instagram_connection(config_data, test_data)
-            elif platform == 'facebook':
-                return self._test_facebook_connection(config_data, test_data)
-            elif platform == 'signal':
-                return self._test_signal_connection(config_data, test_data)
-            else:
-                return {'success': False, 'error': 'Unsupported platform'}
-                
+            return getattr(self, tester)(config_data, test_data)
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
     def _test_whatsapp_connection(self, config_data, test_data):
         """Test WhatsApp Business API connection"""
-        import requests
-        
         access_token = config_data.get('access_token')
         phone_number_id = config_data.get('phone_number_id')
         
@@ -341,10 +489,10 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
             return {'success': False, 'error': 'Missing access token or phone number ID'}
         
         # Test API connection
-        url = f"https://graph.facebook.com/v18.0/{phone_number_id}"
-        headers = {'Authorization': f'Bearer {access_token}'}
+        url = _graph_url(phone_number_id)
+        headers = {'Authorization': _bearer(access_token)}
         
-        response = requests.get(url, headers=headers)
+        response = _http.get(url, headers=headers, timeout=_HTTP_TIMEOUT)
         
         if response.status_code == 200:
             return {'success': True, 'message': 'WhatsApp API connection successful'}
@@ -353,16 +501,14 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
 
     def _test_telegram_connection(self, config_data, test_data):
         """Test Telegram Bot API connection"""
-        import requests
-        
         bot_token = config_data.get('bot_token')
         
         if not bot_token:
             return {'success': False, 'error': 'Missing bot token'}
         
         # Test bot API
-        url = f"https://api.telegram.org/bot{bot_token}/getMe"
-        response = requests.get(url)
+        url = _telegram_get_me_url(bot_token)
+        response = _http.get(url, timeout=_HTTP_TIMEOUT)
         
         if response.status_code == 200:
             bot_info = response.json()
@@ -376,8 +522,6 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
 
     def _test_instagram_connection(self, config_data, test_data):
         """Test Instagram API connection"""
-        import requests
-        
         access_token = config_data.get('access_token')
         page_id = config_data.get('page_id')
         
@@ -385,10 +529,10 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
             return {'success': False, 'error': 'Missing access token or page ID'}
         
         # Test Instagram Basic Display API
-        url = f"https://graph.facebook.com/v18.0/{page_id}"
-        headers = {'Authorization': f'Bearer {access_token}'}
+        url = _graph_url(page_id)
+        headers = {'Authorization': _bearer(access_token)}
         
-        response = requests.get(url, headers=headers)
+        response = _http.get(url, headers=headers, timeout=_HTTP_TIMEOUT)
         
         if response.status_code == 200:
             return {'success': True, 'message': 'Instagram API connection successful'}
@@ -397,8 +541,6 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
 
     def _test_facebook_connection(self, config_data, test_data):
         """Test Facebook Messenger API connection"""
-        import requests
-        
         page_access_token = config_data.get('page_access_token')
         page_id = config_data.get('page_id')
         
@@ -406,10 +548,10 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
             return {'success': False, 'error': 'Missing page access token or page ID'}
         
         # Test Messenger API
-        url = f"https://graph.facebook.com/v18.0/{page_id}"
-        headers = {'Authorization': f'Bearer {page_access_token}'}
+        url = _graph_url(page_id)
+        headers = {'Authorization': _bearer(page_access_token)}
         
-        response = requests.get(url, headers=headers)
+        response = _http.get(url, headers=headers, timeout=_HTTP_TIMEOUT)
         
         if response.status_code == 200:
             return {'success': True, 'message': 'Facebook Messenger API connection successful'}
@@ -426,8 +568,20 @@ class CompanyBridgeConfigurationViewSet(viewsets.ModelViewSet):
         if not phone_number:
             return {'success': False, 'error': 'Missing phone number'}
         
+        if settings.SIGNAL_CLI_SOCKET:
+            try:
+                reply = _signal_rpc('listIdentities', {'account': phone_number})
+            except socket.timeout:
+                return {'success': False, 'error': 'Signal CLI test timed out'}
+            except Exception as e:
+                return {'success': False, 'error': f'Signal CLI test error: {str(e)}'}
+            
+            if 'error' in reply:
+                return {'success': False, 'error': f"Signal CLI test failed: {reply['error'].get('message')}"}
+            return {'success': True, 'message': 'Signal CLI connection successful'}
+        
         try:
-            # Test signal-cli installation and account
+            # No daemon configured, spawn signal-cli for a one-off check
             result = subprocess.run([
                 signal_cli_path, '--account', phone_number, 'listIdentities'
             ], capture_output=True, text=True, timeout=10)
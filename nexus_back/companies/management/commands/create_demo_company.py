@@ -1,11 +1,30 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from companies.models import Company, CompanySettings
+from types import MappingProxyType
 import uuid
 
 User = get_user_model()
 
 
+def _permissions(role):
+    return MappingProxyType({
+        'can_manage_users': role in ('owner', 'admin', 'manager'),
+        'can_manage_settings': role in ('owner', 'admin'),
+        'can_view_analytics': role in ('owner', 'admin', 'manager'),
+        'can_manage_integrations': role in ('owner', 'admin'),
+    })
+
+
+# Read-only per-role templates; copied into each UserRole's JSON field
+_ROLE_PERMISSIONS = {
+    role: _permissions(role)
+    for role in ('owner', 'admin', 'manager', 'agent', 'viewer')
+}
+
+
 class Command(BaseCommand):
     help = 'Create a demo company with sample data for testing'
 
@@ -29,6 +48,7 @@ class Command(BaseCommand):
             help='Password for the admin user',
         )
 
+    @transaction.atomic
     def handle(self, *args, **options):
         company_name = options['company_name']
         admin_email = options['admin_email']
@@ -87,24 +107,17 @@ class Command(BaseCommand):
                 'last_name': 'Admin',
                 'company': company,
                 'is_staff': True,
+                'password': make_password(admin_password),
             }
         )
 
         if user_created:
-            admin_user.set_password(admin_password)
-            admin_user.save()
-            
             # Create user role
             from authentication.models import UserRole
             UserRole.objects.create(
                 user=admin_user,
                 role='owner',
-                permissions={
-                    'can_manage_users': True,
-                    'can_manage_settings': True,
-                    'can_view_analytics': True,
-                    'can_manage_integrations': True
-                }
+                permissions=dict(_ROLE_PERMISSIONS['owner'])
             )
             
             self.stdout.write(
@@ -140,37 +153,46 @@ class Command(BaseCommand):
             },
         ]
 
+        # One lookup for the users that already exist, then batch the rest.
+        # Keyed on username: it is the unique column bulk_create would trip on
+        existing = User.objects.in_bulk(
+            [u['username'] for u in sample_users], field_name='username'
+        )
+        
+        # Sample users share a password, so hash it once
+        sample_password = make_password('demo123456')
+        new_users = []
+        new_roles = {}
         for user_data in sample_users:
             user_role = user_data.pop('role')  # Remove role from user_data
-            user, created = User.objects.get_or_create(
-                email=user_data['email'],
-                defaults={
-                    **user_data,
-                    'company': company,
-                }
-            )
+            if user_data['username'] in existing:
+                continue
             
-            if created:
-                user.set_password('demo123456')
-                user.save()
-                
-                # Create user role
-                from authentication.models import UserRole
-                permissions = {
-                    'can_manage_users': user_role in ['owner', 'admin', 'manager'],
-                    'can_manage_settings': user_role in ['owner', 'admin'],
-                    'can_view_analytics': user_role in ['owner', 'admin', 'manager'],
-                    'can_manage_integrations': user_role in ['owner', 'admin']
-                }
-                UserRole.objects.create(
-                    user=user,
-                    role=user_role,
-                    permissions=permissions
-                )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(f'Created user: {user.email}')
-                )
+            new_users.append(User(
+                **user_data,
+                company=company,
+                password=sample_password,
+            ))
+            new_roles[user_data['email']] = user_role
+        
+        User.objects.bulk_create(new_users)
+        
+        # Create user roles
+        from authentication.models import UserRole
+        user_roles = []
+        for user in new_users:
+            user_role = new_roles[user.email]
+            user_roles.append(UserRole(
+                user=user,
+                role=user_role,
+                permissions=dict(_ROLE_PERMISSIONS[user_role])
+            ))
+        UserRole.objects.bulk_create(user_roles)
+        
+        for user in new_users:
+            self.stdout.write(
+                self.style.SUCCESS(f'Created user: {user.email}')
+            )
 
         self.stdout.write(
             self.style.SUCCESS(
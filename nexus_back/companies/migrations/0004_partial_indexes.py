@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-14 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_companybridgeconfiguration_companybridgewebhook_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='companybridgewebhook',
+            index=models.Index(condition=models.Q(('processed', False)), fields=['created_at'], name='bridge_wh_unprocessed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companyinvitation',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['expires_at'], name='invite_pending_exp_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+# PostgreSQL only: SQLite (local/dev default) has neither GIN nor column storage modes
+FORWARD_SQL = [
+    'CREATE INDEX IF NOT EXISTS wh_eventdata_gin ON company_bridge_webhooks USING gin (event_data)',
+    # Webhook payloads are written once and rarely read, skip pglz on the hot path
+    'ALTER TABLE company_bridge_webhooks ALTER COLUMN event_data SET STORAGE EXTERNAL',
+]
+
+REVERSE_SQL = [
+    'DROP INDEX IF EXISTS wh_eventdata_gin',
+    'ALTER TABLE company_bridge_webhooks ALTER COLUMN event_data SET STORAGE EXTENDED',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-14 16:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_webhook_event_data_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='company',
+            name='companies_slug_e0676c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='company',
+            name='companies_domain_60b9fc_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='companybridgeconfiguration',
+            name='company_bri_company_e0c5df_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='companyinvitation',
+            name='company_inv_token_a333e7_idx',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-14 16:30
+
+import companies.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_drop_redundant_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='companyinvitation',
+            name='expires_at',
+            field=models.DateTimeField(default=companies.models.default_invitation_expiry),
+        ),
+        migrations.AlterField(
+            model_name='companyinvitation',
+            name='token',
+            field=models.CharField(default=companies.models.default_invitation_token, max_length=64, unique=True),
+        ),
+    ]
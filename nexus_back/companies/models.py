@@ -1,9 +1,16 @@
 from django.db import models
 from django.core.validators import EmailValidator, URLValidator
+from django.utils import timezone
 from django.utils.text import slugify
+from django.utils.functional import cached_property
 from django.contrib.auth.hashers import make_password, check_password
+import re
+import secrets
 import uuid
-import json
+from datetime import timedelta
+from functools import lru_cache
+
+import orjson
 
 
 class Company(models.Model):
@@ -70,9 +77,8 @@ class Company(models.Model):
     class Meta:
         db_table = 'companies'
         ordering = ['name']
+        # slug and domain are unique, which already indexes them
         indexes = [
-            models.Index(fields=['slug']),
-            models.Index(fields=['domain']),
             models.Index(fields=['status']),
             models.Index(fields=['plan']),
         ]
@@ -80,22 +86,45 @@ class Company(models.Model):
     def __str__(self):
         return self.name
     
-    @property
-    def users(self):
-        """Get all users belonging to this company"""
-        from authentication.models import CustomUser
-        return CustomUser.objects.filter(company=self)
-
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored name so save() only touches campaigns on a rename
+        instance._loaded_name = instance.__dict__.get('name')
+        return instance
+    
     def save(self, *args, **kwargs):
+        renamed = (
+            not self._state.adding
+            and getattr(self, '_loaded_name', None) is not None
+            and self._loaded_name != self.name
+        )
         if not self.slug:
             self.slug = slugify(self.name)
-            # Ensure uniqueness
+            # Ensure uniqueness: fetch all candidate slugs in one query
             original_slug = self.slug
+            taken = self._taken_slugs(original_slug)
             counter = 1
-            while Company.objects.filter(slug=self.slug).exists():
+            while self.slug in taken:
                 self.slug = f"{original_slug}-{counter}"
                 counter += 1
         super().save(*args, **kwargs)
+        if renamed:
+            # Campaign.company_name is a denormalized copy for __str__
+            self.campaigns.update(company_name=self.name)
+        self._loaded_name = self.name
+
+    @classmethod
+    def _taken_slugs(cls, base):
+        """
+        Existing slugs that collide with base: base itself and its -N variants.
+        Anchored so a short base like "co" doesn't pull in every "co..." slug.
+        """
+        return set(
+            cls.objects.filter(slug__regex=rf'^{re.escape(base)}(-[0-9]+)?$')
+            .order_by()
+            .values_list('slug', flat=True)
+        )
 
     @property
     def is_trial(self):
@@ -160,6 +189,14 @@ class CompanySettings(models.Model):
         return f"Settings for {self.company.name}"
 
 
+def default_invitation_token():
+    return secrets.token_urlsafe(32)
+
+
+def default_invitation_expiry():
+    return timezone.now() + timedelta(days=7)
+
+
 class CompanyInvitation(models.Model):
     """
     Invitations for users to join companies
@@ -197,8 +234,8 @@ class CompanyInvitation(models.Model):
         related_name='received_invitations'
     )
     
-    token = models.CharField(max_length=64, unique=True)
-    expires_at = models.DateTimeField()
+    token = models.CharField(max_length=64, unique=True, default=default_invitation_token)
+    expires_at = models.DateTimeField(default=default_invitation_expiry)
     accepted_at = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -207,31 +244,138 @@ class CompanyInvitation(models.Model):
     class Meta:
         db_table = 'company_invitations'
         unique_together = [['company', 'email']]
+        # token is unique, which already indexes it
         indexes = [
-            models.Index(fields=['token']),
             models.Index(fields=['status']),
             models.Index(fields=['expires_at']),
+            # Expiry sweep only looks at pending invitations
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(status='pending'),
+                name='invite_pending_exp_idx'
+            ),
         ]
 
     def __str__(self):
         return f"Invitation to {self.email} for {self.company.name}"
 
-    def save(self, *args, **kwargs):
-        if not self.expires_at:
-            from django.utils import timezone
-            from datetime import timedelta
-            self.expires_at = timezone.now() + timedelta(days=7)
-        if not self.token:
-            import secrets
-            self.token = secrets.token_urlsafe(32)
-        super().save(*args, **kwargs)
-
     @property
     def is_expired(self):
-        from django.utils import timezone
         return timezone.now() > self.expires_at
 
 
+class BridgeConfigManager(models.Manager):
+    """Joins the company, which __str__ and the bridge views read"""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('company')
+
+
+class BridgeWebhookManager(models.Manager):
+    """Joins the bridge config and its company, which __str__ reads"""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('bridge_config__company')
+
+
+@lru_cache(maxsize=1)
+def _get_fernet():
+    """Build the Fernet cipher for bridge configs once per process"""
+    from django.conf import settings
+    from cryptography.fernet import Fernet
+    import base64
+    
+    # Use company-specific encryption key or global fallback
+    key_string = getattr(settings, 'BRIDGE_ENCRYPTION_KEY', 'your-32-char-encryption-key-here-12345')
+    
+    # Ensure key is exactly 32 bytes for Fernet
+    key_string = key_string.ljust(32, '0')[:32]
+    
+    # Generate a Fernet key from our string
+    key = base64.urlsafe_b64encode(key_string.encode()[:32])
+    return Fernet(key)
+
+
+# Static per-platform setup steps; the webhook URL is added per company
+_SETUP_INSTRUCTIONS = {
+    'whatsapp': {
+        'title': 'WhatsApp Business API Setup',
+        'steps': [
+            'Go to Meta for Developers (developers.facebook.com)',
+            'Create a new app and select "Business" type',
+            'Add WhatsApp Business API product',
+            'Generate a permanent access token',
+            'Add your phone number to the WhatsApp Business account',
+            'Configure webhook URL in your app settings'
+        ],
+        'required_fields': [
+            {'field': 'access_token', 'label': 'Access Token', 'type': 'password'},
+            {'field': 'phone_number_id', 'label': 'Phone Number ID', 'type': 'text'},
+            {'field': 'business_account_id', 'label': 'Business Account ID', 'type': 'text'},
+            {'field': 'webhook_verify_token', 'label': 'Webhook Verify Token', 'type': 'password'},
+        ],
+    },
+    'telegram': {
+        'title': 'Telegram Bot Setup',
+        'steps': [
+            'Message @BotFather on Telegram',
+            'Send /newbot command',
+            'Choose a name and username for your bot',
+            'Copy the bot token provided by BotFather',
+            'Optionally set bot description and profile picture'
+        ],
+        'required_fields': [
+            {'field': 'bot_token', 'label': 'Bot Token', 'type': 'password'},
+            {'field': 'bot_username', 'label': 'Bot Username', 'type': 'text'},
+        ],
+    },
+    'instagram': {
+        'title': 'Instagram Business API Setup',
+        'steps': [
+            'Connect your Instagram Business account to a Facebook Page',
+            'Go to Meta for Developers and create an app',
+            'Add Instagram Basic Display API product',
+            'Generate access tokens for your Instagram account',
+            'Subscribe to Instagram webhook events'
+        ],
+        'required_fields': [
+            {'field': 'access_token', 'label': 'Access Token', 'type': 'password'},
+            {'field': 'page_id', 'label': 'Instagram Page ID', 'type': 'text'},
+            {'field': 'app_secret', 'label': 'App Secret', 'type': 'password'},
+        ],
+    },
+    'facebook': {
+        'title': 'Facebook Messenger Setup',
+        'steps': [
+            'Create a Facebook Page for your business',
+            'Go to Meta for Developers and create an app',
+            'Add Messenger API product',
+            'Generate page access token',
+            'Subscribe your app to page events'
+        ],
+        'required_fields': [
+            {'field': 'page_access_token', 'label': 'Page Access Token', 'type': 'password'},
+            {'field': 'page_id', 'label': 'Facebook Page ID', 'type': 'text'},
+            {'field': 'app_secret', 'label': 'App Secret', 'type': 'password'},
+        ],
+    },
+    'signal': {
+        'title': 'Signal Bot Setup',
+        'steps': [
+            'Install Signal CLI on your server',
+            'Register a phone number with Signal',
+            'Link the number to Signal CLI',
+            'Generate API credentials for Signal bridge'
+        ],
+        'required_fields': [
+            {'field': 'phone_number', 'label': 'Signal Phone Number', 'type': 'text'},
+            {'field': 'signal_cli_path', 'label': 'Signal CLI Path', 'type': 'text'},
+            {'field': 'account_data', 'label': 'Account Data File Path', 'type': 'text'},
+        ],
+    }
+}
+
+
 class CompanyBridgeConfiguration(models.Model):
     """
     Company-specific Matrix bridge configurations for B2B multi-tenancy
@@ -293,11 +437,13 @@ class CompanyBridgeConfiguration(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BridgeConfigManager()
+
     class Meta:
         db_table = 'company_bridge_configurations'
+        # unique_together already indexes (company, platform)
         unique_together = [['company', 'platform']]
         indexes = [
-            models.Index(fields=['company', 'platform']),
             models.Index(fields=['status']),
         ]
 
@@ -307,31 +453,17 @@ class CompanyBridgeConfiguration(models.Model):
     def set_encrypted_config(self, config_data: dict):
         """Encrypt and store sensitive configuration data"""
         try:
-            from django.conf import settings
-            from cryptography.fernet import Fernet
-            import base64
-            
-            # Use company-specific encryption key or global fallback
-            key_string = getattr(settings, 'BRIDGE_ENCRYPTION_KEY', 'your-32-char-encryption-key-here-12345')
-            
-            # Ensure key is exactly 32 bytes for Fernet
-            if len(key_string) < 32:
-                key_string = key_string.ljust(32, '0')
-            elif len(key_string) > 32:
-                key_string = key_string[:32]
-            
-            # Generate a Fernet key from our string
-            key = base64.urlsafe_b64encode(key_string.encode()[:32])
-            f = Fernet(key)
+            f = _get_fernet()
             
-            config_json = json.dumps(config_data)
-            encrypted_config = f.encrypt(config_json.encode())
+            encrypted_config = f.encrypt(orjson.dumps(config_data))
             self.encrypted_config = encrypted_config.decode()
         except ImportError:
             # Fallback to base64 encoding if cryptography is not available
             import base64
-            config_json = json.dumps(config_data)
-            self.encrypted_config = base64.b64encode(config_json.encode()).decode()
+            self.encrypted_config = base64.b64encode(orjson.dumps(config_data)).decode()
+        
+        # Drop the decrypted copy cached from the previous value
+        self.__dict__.pop('decrypted_config', None)
 
     def get_decrypted_config(self) -> dict:
         """Decrypt and return configuration data"""
@@ -339,120 +471,33 @@ class CompanyBridgeConfiguration(models.Model):
             return {}
             
         try:
-            from django.conf import settings
-            from cryptography.fernet import Fernet
-            import base64
-            
-            # Use same key generation as encryption
-            key_string = getattr(settings, 'BRIDGE_ENCRYPTION_KEY', 'your-32-char-encryption-key-here-12345')
-            
-            if len(key_string) < 32:
-                key_string = key_string.ljust(32, '0')
-            elif len(key_string) > 32:
-                key_string = key_string[:32]
-            
-            key = base64.urlsafe_b64encode(key_string.encode()[:32])
-            f = Fernet(key)
+            f = _get_fernet()
             
-            decrypted_data = f.decrypt(self.encrypted_config.encode())
-            return json.loads(decrypted_data.decode())
+            # Fernet accepts the str token as stored
+            decrypted_data = f.decrypt(self.encrypted_config)
+            return orjson.loads(decrypted_data)
         except ImportError:
             # Fallback to base64 decoding
             import base64
             try:
                 decoded_data = base64.b64decode(self.encrypted_config.encode())
-                return json.loads(decoded_data.decode())
+                return orjson.loads(decoded_data)
             except Exception:
                 return {}
         except Exception:
             return {}
 
+    @cached_property
+    def decrypted_config(self) -> dict:
+        """Decrypted configuration, computed once per instance"""
+        return self.get_decrypted_config()
+
     def get_setup_instructions(self) -> dict:
         """Get platform-specific setup instructions for the client"""
-        instructions = {
-            'whatsapp': {
-                'title': 'WhatsApp Business API Setup',
-                'steps': [
-                    'Go to Meta for Developers (developers.facebook.com)',
-                    'Create a new app and select "Business" type',
-                    'Add WhatsApp Business API product',
-                    'Generate a permanent access token',
-                    'Add your phone number to the WhatsApp Business account',
-                    'Configure webhook URL in your app settings'
-                ],
-                'required_fields': [
-                    {'field': 'access_token', 'label': 'Access Token', 'type': 'password'},
-                    {'field': 'phone_number_id', 'label': 'Phone Number ID', 'type': 'text'},
-                    {'field': 'business_account_id', 'label': 'Business Account ID', 'type': 'text'},
-                    {'field': 'webhook_verify_token', 'label': 'Webhook Verify Token', 'type': 'password'},
-                ],
-                'webhook_url': f'/api/webhooks/whatsapp/{self.company.id}/',
-            },
-            'telegram': {
-                'title': 'Telegram Bot Setup',
-                'steps': [
-                    'Message @BotFather on Telegram',
-                    'Send /newbot command',
-                    'Choose a name and username for your bot',
-                    'Copy the bot token provided by BotFather',
-                    'Optionally set bot description and profile picture'
-                ],
-                'required_fields': [
-                    {'field': 'bot_token', 'label': 'Bot Token', 'type': 'password'},
-                    {'field': 'bot_username', 'label': 'Bot Username', 'type': 'text'},
-                ],
-                'webhook_url': f'/api/webhooks/telegram/{self.company.id}/',
-            },
-            'instagram': {
-                'title': 'Instagram Business API Setup',
-                'steps': [
-                    'Connect your Instagram Business account to a Facebook Page',
-                    'Go to Meta for Developers and create an app',
-                    'Add Instagram Basic Display API product',
-                    'Generate access tokens for your Instagram account',
-                    'Subscribe to Instagram webhook events'
-                ],
-                'required_fields': [
-                    {'field': 'access_token', 'label': 'Access Token', 'type': 'password'},
-                    {'field': 'page_id', 'label': 'Instagram Page ID', 'type': 'text'},
-                    {'field': 'app_secret', 'label': 'App Secret', 'type': 'password'},
-                ],
-                'webhook_url': f'/api/webhooks/instagram/{self.company.id}/',
-            },
-            'facebook': {
-                'title': 'Facebook Messenger Setup',
-                'steps': [
-                    'Create a Facebook Page for your business',
-                    'Go to Meta for Developers and create an app',
-                    'Add Messenger API product',
-                    'Generate page access token',
-                    'Subscribe your app to page events'
-                ],
-                'required_fields': [
-                    {'field': 'page_access_token', 'label': 'Page Access Token', 'type': 'password'},
-                    {'field': 'page_id', 'label': 'Facebook Page ID', 'type': 'text'},
-                    {'field': 'app_secret', 'label': 'App Secret', 'type': 'password'},
-                ],
-                'webhook_url': f'/api/webhooks/facebook/{self.company.id}/',
-            },
-            'signal': {
-                'title': 'Signal Bot Setup',
-                'steps': [
-                    'Install Signal CLI on your server',
-                    'Register a phone number with Signal',
-                    'Link the number to Signal CLI',
-                    'Generate API credentials for Signal bridge'
-                ],
-                'required_fields': [
-                    {'field': 'phone_number', 'label': 'Signal Phone Number', 'type': 'text'},
-                    {'field': 'signal_cli_path', 'label': 'Signal CLI Path', 'type': 'text'},
-                    {'field': 'account_data', 'label': 'Account Data File Path', 'type': 'text'},
-                ],
-                'webhook_url': f'/api/webhooks/signal/{self.company.id}/',
-            }
-        }
-        
-        return instructions.get(self.platform, {})
+        entry = _SETUP_INSTRUCTIONS.get(self.platform)
+        if not entry:
+            return {}
+        return {**entry, 'webhook_url': f'/api/webhooks/{self.platform}/{self.company_id}/'}
 
 
 class CompanyBridgeWebhook(models.Model):
@@ -482,11 +527,19 @@ class CompanyBridgeWebhook(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BridgeWebhookManager()
+
     class Meta:
         db_table = 'company_bridge_webhooks'
         indexes = [
             models.Index(fields=['bridge_config', 'event_type']),
             models.Index(fields=['processed', 'created_at']),
+            # Stays small: processed rows drop out of it
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(processed=False),
+                name='bridge_wh_unprocessed_idx'
+            ),
         ]
 
     def __str__(self):
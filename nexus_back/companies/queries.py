@@ -0,0 +1,22 @@
+"""
+Shared query expressions for per-company counters
+"""
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def company_aggregate(queryset, aggregate=None, company_path='company'):
+    """
+    Correlated subquery aggregating queryset's rows for the outer Company (0 when none).
+
+    Several of these in one annotate() stay a single SELECT without joining the
+    relations together, which would multiply e.g. users x bridges x rooms rows.
+    """
+    rows = (
+        queryset.filter(**{company_path: OuterRef('pk')})
+        .order_by()
+        .values(company_path)
+        .annotate(value=aggregate or Count('pk'))
+        .values('value')
+    )
+    return Coalesce(Subquery(rows), 0)
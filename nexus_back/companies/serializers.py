@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Company, CompanySettings, CompanyInvitation
+from nexus_back.serializers import CachedFieldsMixin
 
 class CompanySerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,15 +23,28 @@ class CompanyDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'slug', 'subscription_plan', 'trial_expires_at', 'created_at')
     
     def get_total_users(self, obj):
-        return obj.users.count()
+        count = getattr(obj, 'total_users_count', None)
+        return obj.users.count() if count is None else count
         
     def get_active_bridges(self, obj):
-        return obj.bridge_connections.filter(is_active=True).count()
+        count = getattr(obj, 'active_bridges_count', None)
+        if count is None:
+            count = obj.bridges.filter(status='connected').count()
+        return count
 
-class CompanySettingsSerializer(serializers.ModelSerializer):
+class CompanySettingsSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CompanySettings
-        fields = '__all__'
+        fields = (
+            'id', 'company',
+            'ai_enabled', 'ai_provider', 'ai_model', 'ai_temperature', 'ai_max_tokens',
+            'message_retention_days', 'auto_archive_days',
+            'email_notifications', 'webhook_url', 'webhook_events',
+            'require_2fa', 'allowed_ip_ranges', 'session_timeout_minutes',
+            'matrix_room_prefix', 'auto_create_rooms', 'bridge_auto_reconnect',
+            'business_hours', 'auto_response_enabled',
+            'created_at', 'updated_at',
+        )
         read_only_fields = ('company',)
 
 class CompanyInvitationSerializer(serializers.ModelSerializer):
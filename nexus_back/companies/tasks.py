@@ -1,70 +1,215 @@
 from celery import shared_task
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mail, send_mass_mail
 from django.conf import settings
-from .models import CompanyInvitation
+from django.db import transaction
+from authentication.models import CustomUser
+from matrix_integration.models import BridgeConnection, MatrixRoom
+from .models import Company, CompanyInvitation
+from .queries import company_aggregate
 import logging
+import smtplib
+import threading
+from string import Template
 
 logger = logging.getLogger(__name__)
 
+EXPIRE_BATCH_SIZE = 5000
+
+# SMTP relay budget per Celery worker instance (N workers -> N x this).
+# rate_limit keeps a separate bucket per task type, so the budget is split
+# evenly across the three mail tasks and the shares add up to the total
+MAIL_PER_MINUTE = 30
+_MAIL_TASKS = 3
+_MAIL_SHARE = MAIL_PER_MINUTE // _MAIL_TASKS
+MAIL_RATE_LIMIT = f'{_MAIL_SHARE}/m'
+
+# rate_limit also counts task runs, not messages: bulk sends are split into
+# chunks and the bulk task runs chunk-size times less often than single sends
+BULK_EMAIL_CHUNK = 10
+BULK_MAIL_RATE_LIMIT = f'{max(_MAIL_SHARE // BULK_EMAIL_CHUNK, 1)}/m'
+
+# Columns invitation_email_payload reads; company must stay loaded for select_related
+_INVITATION_EMAIL_FIELDS = ('email', 'role', 'token', 'expires_at', 'company', 'company__name')
+
+# Email templates, parsed once at import
+_INVITE_SUBJECT = Template("Invitation to join $company")
+_INVITE_BODY = Template("""\
+Hello,
+
+You've been invited to join $company as a $role.
+
+Click the link below to accept the invitation:
+$url
+
+This invitation will expire on $expires.
+
+Best regards,
+The Nexus Team
+""")
+
+_WELCOME_SUBJECT = Template("Welcome to $company!")
+_WELCOME_BODY = Template("""\
+Hello $name,
+
+Welcome to $company! Your account has been successfully created.
+
+You can now access your dashboard at:
+$url
+
+If you have any questions, please don't hesitate to reach out to our support team.
+
+Best regards,
+The Nexus Team
+""")
+
+
+# One mail connection per worker thread, kept open between tasks
+_mail = threading.local()
+
+
+def _mail_connection():
+    """Return this thread's open mail connection, opening it on first use"""
+    connection = getattr(_mail, 'connection', None)
+    if connection is None:
+        connection = get_connection()
+        connection.open()
+        _mail.connection = connection
+    return connection
+
+
+def _send_mail(*args, **kwargs):
+    """
+    send_mail over a reused connection. If the relay dropped the idle
+    connection, reconnect once and resend.
+    """
+    try:
+        return send_mail(*args, connection=_mail_connection(), **kwargs)
+    except (smtplib.SMTPServerDisconnected, ConnectionError):
+        # The socket is already dead, just drop it
+        _mail.connection = None
+        return send_mail(*args, connection=_mail_connection(), **kwargs)
+
 
 @shared_task
 def cleanup_expired_invitations():
     """Clean up expired company invitations"""
     try:
-        expired_invitations = CompanyInvitation.objects.filter(
-            expires_at__lt=timezone.now(),
-            status='pending'
-        )
+        now = timezone.now()
+        count = 0
+        # Bounded batches keep each transaction's lock set and WAL small
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    CompanyInvitation.objects.filter(
+                        expires_at__lt=now,
+                        status='pending'
+                    ).values_list('pk', flat=True)[:EXPIRE_BATCH_SIZE]
+                )
+                if not batch:
+                    break
+                # The SELECT took no locks: re-check the predicate so an invitation
+                # accepted in between isn't overwritten. update() returns rows changed
+                count += CompanyInvitation.objects.filter(
+                    pk__in=batch,
+                    expires_at__lt=now,
+                    status='pending'
+                ).update(status='expired')
         
-        count = expired_invitations.count()
-        expired_invitations.update(status='expired')
-        
-        logger.info(f"Marked {count} invitations as expired")
+        logger.info("Marked %s invitations as expired", count)
         return f"Processed {count} expired invitations"
         
     except Exception as e:
-        logger.error(f"Error cleaning up expired invitations: {str(e)}")
+        logger.error("Error cleaning up expired invitations: %s", e)
         raise
 
 
-@shared_task
-def send_invitation_email(invitation_id):
+def invitation_email_payload(invitation):
+    """
+    Serializable kwargs for send_invitation_email, built where the invitation
+    is already loaded so the worker doesn't have to fetch or format anything
+    """
+    return {
+        'invitation_id': str(invitation.id),
+        'email': invitation.email,
+        'company_name': invitation.company.name,
+        'role': invitation.role,
+        'invite_url': f"{settings.FRONTEND_URL}/invite/{invitation.token}",
+        'expires_str': invitation.expires_at.strftime('%Y-%m-%d %H:%M UTC'),
+    }
+
+
+def _invitation_message(email, company_name, role, invite_url, expires_str, **extra):
+    """Build the (subject, message, from_email, recipient_list) tuple for an invitation"""
+    subject = _INVITE_SUBJECT.substitute(company=company_name)
+    message = _INVITE_BODY.substitute(
+        company=company_name,
+        role=role,
+        url=invite_url,
+        expires=expires_str,
+    )
+    return subject, message, settings.DEFAULT_FROM_EMAIL, [email]
+
+
+@shared_task(rate_limit=MAIL_RATE_LIMIT)
+def send_invitation_email(invitation_id, email=None, company_name=None, role=None,
+                          invite_url=None, expires_str=None):
     """Send invitation email asynchronously"""
     try:
-        invitation = CompanyInvitation.objects.get(id=invitation_id)
+        if email is None:
+            # Legacy/id-only enqueue: load and format on the worker
+            invitation = CompanyInvitation.objects.select_related('company').only(
+                *_INVITATION_EMAIL_FIELDS
+            ).get(id=invitation_id)
+            payload = invitation_email_payload(invitation)
+        else:
+            payload = {
+                'email': email,
+                'company_name': company_name,
+                'role': role,
+                'invite_url': invite_url,
+                'expires_str': expires_str,
+            }
         
-        subject = f"Invitation to join {invitation.company.name}"
-        message = f"""
-        Hello,
+        _send_mail(*_invitation_message(**payload), fail_silently=False)
         
-        You've been invited to join {invitation.company.name} as a {invitation.role}.
+        logger.info("Invitation email sent to %s", payload['email'])
+        return f"Email sent to {payload['email']}"
         
-        Click the link below to accept the invitation:
-        {settings.FRONTEND_URL}/invite/{invitation.token}
-        
-        This invitation will expire on {invitation.expires_at.strftime('%Y-%m-%d %H:%M UTC')}.
+    except CompanyInvitation.DoesNotExist:
+        logger.error("Invitation %s not found", invitation_id)
+        raise
+    except Exception as e:
+        logger.error("Error sending invitation email: %s", e)
+        raise
+
+
+@shared_task(rate_limit=BULK_MAIL_RATE_LIMIT)
+def send_invitation_emails_bulk(invitation_ids):
+    """Send several invitation emails with one query and one SMTP connection"""
+    try:
+        if len(invitation_ids) > BULK_EMAIL_CHUNK:
+            # Re-enqueue as bounded chunks, each one throttled by the rate limit
+            for start in range(0, len(invitation_ids), BULK_EMAIL_CHUNK):
+                send_invitation_emails_bulk.delay(invitation_ids[start:start + BULK_EMAIL_CHUNK])
+            logger.info("Split %s invitation emails into chunks of %s", len(invitation_ids), BULK_EMAIL_CHUNK)
+            return f"Queued {len(invitation_ids)} invitation emails"
         
-        Best regards,
-        The Nexus Team
-        """
+        invitations = CompanyInvitation.objects.select_related('company').only(
+            *_INVITATION_EMAIL_FIELDS
+        ).filter(id__in=invitation_ids)
         
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [invitation.email],
+        # send_mass_mail opens a single connection for all messages
+        sent = send_mass_mail(
+            [_invitation_message(**invitation_email_payload(invitation)) for invitation in invitations],
             fail_silently=False,
         )
         
-        logger.info(f"Invitation email sent to {invitation.email}")
-        return f"Email sent to {invitation.email}"
+        logger.info("Sent %s of %s invitation emails", sent, len(invitation_ids))
+        return f"Sent {sent} invitation emails"
         
-    except CompanyInvitation.DoesNotExist:
-        logger.error(f"Invitation {invitation_id} not found")
-        raise
     except Exception as e:
-        logger.error(f"Error sending invitation email: {str(e)}")
+        logger.error("Error sending invitation emails: %s", e)
         raise
 
 
@@ -72,23 +217,24 @@ def send_invitation_email(invitation_id):
 def update_company_stats(company_id):
     """Update company statistics"""
     try:
-        from .models import Company
-        
-        company = Company.objects.get(id=company_id)
-        
-        # Update various stats
-        total_users = company.users.count()
-        active_bridges = company.bridges.filter(status='connected').count()
-        total_rooms = company.matrix_rooms.count()
+        # All counts in one query, as correlated subqueries (see company_aggregate)
+        stats = Company.objects.annotate(
+            total_users=company_aggregate(CustomUser.objects.all()),
+            active_bridges=company_aggregate(BridgeConnection.objects.filter(status='connected')),
+            total_rooms=company_aggregate(MatrixRoom.objects.all()),
+        ).values('name', 'total_users', 'active_bridges', 'total_rooms').get(id=company_id)
         
         # Could store these in a separate CompanyStats model
         # For now, just log them
-        logger.info(f"Company {company.name} stats: {total_users} users, {active_bridges} bridges, {total_rooms} rooms")
+        logger.info(
+            "Company %s stats: %s users, %s bridges, %s rooms",
+            stats['name'], stats['total_users'], stats['active_bridges'], stats['total_rooms']
+        )
         
-        return f"Updated stats for {company.name}"
+        return f"Updated stats for {stats['name']}"
         
     except Exception as e:
-        logger.error(f"Error updating company stats: {str(e)}")
+        logger.error("Error updating company stats: %s", e)
         raise
 
 
@@ -96,9 +242,7 @@ def update_company_stats(company_id):
 def generate_company_report(company_id, report_type='monthly'):
     """Generate company usage report"""
     try:
-        from .models import Company
-        
-        company = Company.objects.get(id=company_id)
+        company = Company.objects.only('id', 'name').get(id=company_id)
         
         # Generate report based on type
         if report_type == 'monthly':
@@ -108,40 +252,29 @@ def generate_company_report(company_id, report_type='monthly'):
             # TODO: Implement weekly report generation
             pass
         
-        logger.info(f"Generated {report_type} report for {company.name}")
+        logger.info("Generated %s report for %s", report_type, company.name)
         return f"Generated {report_type} report for {company.name}"
         
     except Exception as e:
-        logger.error(f"Error generating company report: {str(e)}")
+        logger.error("Error generating company report: %s", e)
         raise
 
 
-@shared_task
+@shared_task(rate_limit=MAIL_RATE_LIMIT)
 def send_welcome_email(user_id, company_id):
     """Send welcome email to new company user"""
     try:
-        from authentication.models import CustomUser
-        from .models import Company
+        user = CustomUser.objects.only('email', 'first_name', 'username').get(id=user_id)
+        company = Company.objects.only('id', 'name').get(id=company_id)
         
-        user = CustomUser.objects.get(id=user_id)
-        company = Company.objects.get(id=company_id)
-        
-        subject = f"Welcome to {company.name}!"
-        message = f"""
-        Hello {user.first_name or user.username},
-        
-        Welcome to {company.name}! Your account has been successfully created.
-        
-        You can now access your dashboard at:
-        {settings.FRONTEND_URL}/dashboard
-        
-        If you have any questions, please don't hesitate to reach out to our support team.
-        
-        Best regards,
-        The Nexus Team
-        """
+        subject = _WELCOME_SUBJECT.substitute(company=company.name)
+        message = _WELCOME_BODY.substitute(
+            name=user.first_name or user.username,
+            company=company.name,
+            url=f"{settings.FRONTEND_URL}/dashboard",
+        )
         
-        send_mail(
+        _send_mail(
             subject=subject,
             message=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
@@ -149,9 +282,9 @@ def send_welcome_email(user_id, company_id):
             fail_silently=False
         )
         
-        logger.info(f"Welcome email sent to {user.email}")
+        logger.info("Welcome email sent to %s", user.email)
         return f"Welcome email sent to {user.email}"
         
     except Exception as e:
-        logger.error(f"Error sending welcome email: {str(e)}")
+        logger.error("Error sending welcome email: %s", e)
         raise
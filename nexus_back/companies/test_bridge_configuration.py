@@ -1,9 +1,12 @@
 """
 Bridge Configuration Tests - B2B Multi-tenant Bridge Setup
 """
+import itertools
 import json
+import queue
+import socket
 from unittest.mock import Mock, patch
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
@@ -18,8 +21,9 @@ User = get_user_model()
 class BridgeConfigurationModelTest(TestCase):
     """Test bridge configuration models"""
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
@@ -61,6 +65,19 @@ class BridgeConfigurationModelTest(TestCase):
         self.assertEqual(decrypted_data['access_token'], 'secret_token_123')
         self.assertEqual(decrypted_data['webhook_verify_token'], 'verify_token_456')
 
+    def test_decrypted_config_cached_until_reencrypted(self):
+        """Test decrypted config is cached and refreshed on re-encryption"""
+        config = CompanyBridgeConfiguration(company=self.company, platform='telegram')
+        config.set_encrypted_config({'bot_token': 'first'})
+        
+        self.assertEqual(config.decrypted_config['bot_token'], 'first')
+        with patch.object(CompanyBridgeConfiguration, 'get_decrypted_config') as mock_decrypt:
+            self.assertEqual(config.decrypted_config['bot_token'], 'first')
+            mock_decrypt.assert_not_called()
+        
+        config.set_encrypted_config({'bot_token': 'second'})
+        self.assertEqual(config.decrypted_config['bot_token'], 'second')
+
     def test_setup_instructions(self):
         """Test getting setup instructions for platforms"""
         config = CompanyBridgeConfiguration.objects.create(
@@ -97,32 +114,37 @@ class BridgeConfigurationModelTest(TestCase):
 class BridgeConfigurationAPITest(APITestCase):
     """Test bridge configuration API endpoints"""
 
-    def setUp(self):
-        self.client = APIClient()
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.user = User.objects.create_user(
+        cls.user = User.objects.create_user(
             username="testuser",
             email="test@example.com",
-            company=self.company
+            company=cls.company
         )
         UserRole.objects.create(
-            user=self.user,
+            user=cls.user,
             role="admin",
             permissions={"can_manage_bridges": True}
         )
         
-        # Authenticate
-        refresh = RefreshToken.for_user(self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        # Signed once per class; tests only reattach the header
+        cls.auth_header = f'Bearer {RefreshToken.for_user(cls.user).access_token}'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth_header)
 
     def test_get_platforms_status(self):
         """Test getting platform status overview"""
         url = '/api/bridge-configs/platforms/'
-        response = self.client.get(url)
+        # user (auth), company, configs
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('platforms', response.data)
@@ -238,7 +260,7 @@ class BridgeConfigurationAPITest(APITestCase):
             'access_token': 'test_token',
             'phone_number_id': '123456789'
         })
-        config.save()
+        config.save(update_fields=['encrypted_config', 'updated_at'])
         
         # Mock successful test and matrix initialization
         mock_test.return_value = {'success': True, 'message': 'Test successful'}
@@ -260,6 +282,54 @@ class BridgeConfigurationAPITest(APITestCase):
         self.assertEqual(config.status, 'active')
         self.assertIsNotNone(config.setup_completed_at)
 
+    @patch('companies.bridge_views.CompanyBridgeConfigurationViewSet._test_telegram_connection')
+    @patch('companies.bridge_views.CompanyBridgeConfigurationViewSet._test_whatsapp_connection')
+    def test_test_all_bridges(self, mock_whatsapp, mock_telegram):
+        """Test checking all company bridges in one request"""
+        CompanyBridgeConfiguration.objects.bulk_create([
+            CompanyBridgeConfiguration(
+                company=self.company,
+                platform=platform,
+                status='configured'
+            )
+            for platform in ('whatsapp', 'telegram')
+        ])
+
+        mock_whatsapp.return_value = {'success': True, 'message': 'ok'}
+        mock_telegram.return_value = {'success': False, 'error': 'Invalid bot token'}
+
+        url = '/api/bridge-configs/test_all/'
+        response = self.client.post(url, {'skip_message_test': True}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {r['platform']: r for r in response.data['results']}
+        self.assertTrue(results['whatsapp']['success'])
+        self.assertFalse(results['telegram']['success'])
+
+        # Batch check is read-only
+        self.assertEqual(
+            CompanyBridgeConfiguration.objects.filter(status='configured').count(), 2
+        )
+
+    def test_list_bridges_skips_encrypted_config(self):
+        """Test listing bridges doesn't load the encrypted credentials"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        config = CompanyBridgeConfiguration(company=self.company, platform='telegram')
+        config.set_encrypted_config({'bot_token': 'secret'})
+        config.save()
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bridge-configs/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'telegram')
+        config_queries = [q['sql'] for q in queries if 'company_bridge_configurations' in q['sql']]
+        self.assertTrue(config_queries)
+        for sql in config_queries:
+            self.assertNotIn('encrypted_config', sql)
+
     def test_get_bridge_status(self):
         """Test getting detailed bridge status"""
         config = CompanyBridgeConfiguration.objects.create(
@@ -276,14 +346,22 @@ class BridgeConfigurationAPITest(APITestCase):
             processed=True
         )
         
+        # Extra events must not add queries
+        CompanyBridgeWebhook.objects.bulk_create([
+            CompanyBridgeWebhook(bridge_config=config, event_type='message_sent', event_data={})
+            for _ in range(5)
+        ])
+        
         url = f'/api/bridge-configs/{config.id}/status/'
-        response = self.client.get(url)
+        # user (auth), user's company, config + company, recent events
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['platform'], 'whatsapp')
         self.assertEqual(response.data['status'], 'active')
         self.assertIn('recent_events', response.data)
-        self.assertEqual(len(response.data['recent_events']), 1)
+        self.assertEqual(len(response.data['recent_events']), 6)
 
     def test_deactivate_bridge(self):
         """Test deactivating a bridge"""
@@ -327,19 +405,20 @@ class BridgeConfigurationAPITest(APITestCase):
 class BridgeConnectionTestCase(TestCase):
     """Test platform connection methods"""
     
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.config = CompanyBridgeConfiguration.objects.create(
-            company=self.company,
+        cls.config = CompanyBridgeConfiguration.objects.create(
+            company=cls.company,
             platform='whatsapp',
             status='configured'
         )
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_whatsapp_connection_success(self, mock_get):
         """Test successful WhatsApp API connection"""
         from companies.bridge_views import CompanyBridgeConfigurationViewSet
@@ -359,7 +438,7 @@ class BridgeConnectionTestCase(TestCase):
         self.assertTrue(result['success'])
         self.assertIn('WhatsApp API connection successful', result['message'])
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_whatsapp_connection_failure(self, mock_get):
         """Test failed WhatsApp API connection"""
         from companies.bridge_views import CompanyBridgeConfigurationViewSet
@@ -379,7 +458,7 @@ class BridgeConnectionTestCase(TestCase):
         self.assertFalse(result['success'])
         self.assertIn('API test failed', result['error'])
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_telegram_connection_success(self, mock_get):
         """Test successful Telegram bot connection"""
         from companies.bridge_views import CompanyBridgeConfigurationViewSet
@@ -403,3 +482,99 @@ class BridgeConnectionTestCase(TestCase):
         self.assertTrue(result['success'])
         self.assertIn('Telegram bot connection successful', result['message'])
         self.assertIn('bot_info', result)
+
+    @override_settings(SIGNAL_CLI_SOCKET='/run/signal-cli/socket')
+    @patch('companies.bridge_views._signal_rpc')
+    def test_signal_connection_via_daemon(self, mock_rpc):
+        """Test Signal check goes through the signal-cli daemon when configured"""
+        from companies.bridge_views import CompanyBridgeConfigurationViewSet
+        
+        mock_rpc.return_value = {'jsonrpc': '2.0', 'id': 1, 'result': []}
+        
+        viewset = CompanyBridgeConfigurationViewSet()
+        result = viewset._test_signal_connection({'phone_number': '+15550001111'}, {})
+        
+        self.assertTrue(result['success'])
+        mock_rpc.assert_called_once_with('listIdentities', {'account': '+15550001111'})
+        
+        mock_rpc.return_value = {
+            'jsonrpc': '2.0', 'id': 2,
+            'error': {'code': -1, 'message': 'User is not registered'}
+        }
+        result = viewset._test_signal_connection({'phone_number': '+15550001111'}, {})
+        
+        self.assertFalse(result['success'])
+        self.assertIn('User is not registered', result['error'])
+
+
+class SignalRpcTest(SimpleTestCase):
+    """Test the signal-cli JSON-RPC client against an in-process socket pair"""
+    
+    def setUp(self):
+        patcher = patch('companies.bridge_views._signal_connections', queue.LifoQueue(maxsize=4))
+        self.pool = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('companies.bridge_views._signal_request_ids', itertools.count(7))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def _socketpair(self):
+        client, daemon = socket.socketpair()
+        client.settimeout(1)
+        daemon.settimeout(1)
+        self.addCleanup(client.close)
+        self.addCleanup(daemon.close)
+        return client, daemon
+    
+    def test_skips_notifications_until_matching_reply(self):
+        """Test line framing, notification skipping and returning the socket to the pool"""
+        from companies.bridge_views import _signal_rpc
+        
+        client, daemon = self._socketpair()
+        reader = client.makefile('rb')
+        self.addCleanup(reader.close)
+        self.pool.put_nowait((client, reader))
+        # Queue a notification ahead of the reply, and a stray reply for another id
+        daemon.sendall(
+            b'{"jsonrpc": "2.0", "method": "receive", "params": {}}\n'
+            b'{"jsonrpc": "2.0", "id": 6, "result": "stale"}\n'
+            b'{"jsonrpc": "2.0", "id": 7, "result": []}\n'
+        )
+        
+        reply = _signal_rpc('listIdentities', {'account': '+15550001111'})
+        
+        self.assertEqual(reply, {'jsonrpc': '2.0', 'id': 7, 'result': []})
+        request = daemon.recv(4096)
+        self.assertTrue(request.endswith(b'\n'))
+        self.assertEqual(request.count(b'\n'), 1)
+        self.assertEqual(json.loads(request), {
+            'jsonrpc': '2.0',
+            'method': 'listIdentities',
+            'params': {'account': '+15550001111'},
+            'id': 7,
+        })
+        self.assertEqual(self.pool.get_nowait(), (client, reader))
+    
+    def test_stale_pooled_socket_retries_on_fresh_connection(self):
+        """Test a pooled socket closed by a daemon restart is replaced once"""
+        from companies.bridge_views import _signal_rpc
+        
+        stale, stale_daemon = self._socketpair()
+        stale_reader = stale.makefile('rb')
+        self.addCleanup(stale_reader.close)
+        stale_daemon.close()
+        self.pool.put_nowait((stale, stale_reader))
+        
+        fresh, daemon = self._socketpair()
+        fresh_reader = fresh.makefile('rb')
+        self.addCleanup(fresh_reader.close)
+        daemon.sendall(b'{"jsonrpc": "2.0", "id": 7, "result": []}\n')
+        
+        with patch('companies.bridge_views._signal_connect', return_value=(fresh, fresh_reader)) as connect:
+            reply = _signal_rpc('listIdentities', {'account': '+15550001111'})
+        
+        self.assertEqual(reply['result'], [])
+        connect.assert_called_once_with(5)
+        self.assertEqual(stale.fileno(), -1)
+        self.assertEqual(self.pool.get_nowait(), (fresh, fresh_reader))
+        self.assertTrue(self.pool.empty())
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
@@ -16,18 +16,27 @@ User = get_user_model()
 class CompanyModelTest(TestCase):
     """Test Company model functionality"""
 
-    def test_create_company(self):
-        """Test creating a company"""
-        company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small",
             website="https://example.com"
         )
-        self.assertEqual(company.name, "Test Company")
-        self.assertEqual(company.slug, "test-company")
-        self.assertTrue(company.is_active)
-        self.assertEqual(company.plan, "trial")
+
+    def test_create_company(self):
+        """Test creating a company fills in its defaults"""
+        cases = (
+            ('name', self.company.name, "Test Company"),
+            ('slug', self.company.slug, "test-company"),
+            ('is_active', self.company.is_active, True),
+            ('plan', self.company.plan, "trial"),
+            ('str', str(self.company), "Test Company"),
+        )
+        for attr, actual, expected in cases:
+            with self.subTest(attr=attr):
+                self.assertEqual(actual, expected)
 
     def test_company_slug_generation(self):
         """Test automatic slug generation"""
@@ -38,46 +47,46 @@ class CompanyModelTest(TestCase):
         )
         self.assertEqual(company.slug, "my-amazing-company-ltd")
 
-    def test_company_str_representation(self):
-        """Test company string representation"""
-        company = Company.objects.create(
-            name="Test Company",
-            industry="technology",
-            size="small"
-        )
-        self.assertEqual(str(company), "Test Company")
-
     def test_trial_expiration_default(self):
         """Test trial expiration is set by default"""
-        company = Company.objects.create(
-            name="Test Company",
-            industry="technology",
-            size="small"
-        )
-        self.assertIsNotNone(company.trial_expires_at)
+        self.assertIsNotNone(self.company.trial_expires_at)
 
     def test_unique_slug_constraint(self):
         """Test that company slugs are unique"""
-        Company.objects.create(
-            name="Test Company",
-            industry="technology",
-            size="small"
-        )
+        # Same name as the class company: one lookup for taken slugs, then the insert
+        with self.assertNumQueries(2):
+            company2 = Company.objects.create(
+                name="Test Company",
+                industry="technology",
+                size="medium"
+            )
+        self.assertNotEqual(company2.slug, self.company.slug)
+        self.assertEqual(company2.slug, "test-company-1")
+
+    def test_slug_collision_uses_first_free_suffix(self):
+        """Test colliding slugs get the first unused numeric suffix"""
+        Company.objects.create(name="Acme", slug="acme")
+        Company.objects.create(name="Acme", slug="acme-2")
+        Company.objects.create(name="Acme Labs", slug="acme-labs")
         
-        # Second company with same name should get different slug
-        company2 = Company.objects.create(
-            name="Test Company",
-            industry="technology",
-            company_size="50-100"
-        )
-        self.assertNotEqual(company2.slug, "test-company")
+        self.assertEqual(Company.objects.create(name="Acme").slug, "acme-1")
+        self.assertEqual(Company.objects.create(name="Acme").slug, "acme-3")
+
+    def test_slug_lookup_ignores_longer_prefixed_slugs(self):
+        """Test the collision lookup only reads the base slug and its numeric variants"""
+        for slug in ("co", "co-2", "co-op-bank", "corp", "co-2b"):
+            Company.objects.create(name=slug, slug=slug)
+        
+        self.assertEqual(Company._taken_slugs("co"), {"co", "co-2"})
+        self.assertEqual(Company.objects.create(name="Co").slug, "co-1")
 
 
 class CompanySettingsModelTest(TestCase):
     """Test CompanySettings model functionality"""
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
@@ -106,16 +115,17 @@ class CompanySettingsModelTest(TestCase):
 class CompanyInvitationModelTest(TestCase):
     """Test CompanyInvitation model functionality"""
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.inviter = User.objects.create_user(
+        cls.inviter = User.objects.create_user(
             username="inviter",
             email="inviter@example.com",
-            company=self.company
+            company=cls.company
         )
 
     def test_create_company_invitation(self):
@@ -152,32 +162,171 @@ class CompanyInvitationModelTest(TestCase):
         expected = f"{self.company.name} - newuser@example.com"
         self.assertEqual(str(invitation), expected)
 
+    @patch('companies.tasks.EXPIRE_BATCH_SIZE', 2)
+    def test_cleanup_expired_invitations_in_batches(self):
+        """Test expired pending invitations are swept across several batches"""
+        from django.utils import timezone
+        from datetime import timedelta
+        from .tasks import cleanup_expired_invitations
+        
+        past = timezone.now() - timedelta(days=1)
+        CompanyInvitation.objects.bulk_create([
+            CompanyInvitation(
+                company=self.company,
+                email=f"user{i}@example.com",
+                invited_by=self.inviter,
+                expires_at=past
+            )
+            for i in range(5)
+        ])
+        CompanyInvitation.objects.create(
+            company=self.company,
+            email="fresh@example.com",
+            invited_by=self.inviter
+        )
+        
+        self.assertEqual(cleanup_expired_invitations(), "Processed 5 expired invitations")
+        self.assertEqual(CompanyInvitation.objects.filter(status='expired').count(), 5)
+        self.assertEqual(CompanyInvitation.objects.filter(status='pending').count(), 1)
+
+    def test_cleanup_skips_invitations_accepted_mid_batch(self):
+        """Test an invitation accepted between the batch SELECT and UPDATE stays accepted"""
+        from django.utils import timezone
+        from datetime import timedelta
+        from .tasks import cleanup_expired_invitations
+        
+        past = timezone.now() - timedelta(days=1)
+        invitations = CompanyInvitation.objects.bulk_create([
+            CompanyInvitation(
+                company=self.company,
+                email=f"user{i}@example.com",
+                invited_by=self.inviter,
+                expires_at=past
+            )
+            for i in range(3)
+        ])
+        accepted = invitations[0]
+        real_filter = CompanyInvitation.objects.filter
+        
+        def filter_then_accept(*args, **kwargs):
+            # Simulate the user accepting right before the batch UPDATE runs
+            if 'pk__in' in kwargs:
+                real_filter(pk=accepted.pk).update(status='accepted')
+            return real_filter(*args, **kwargs)
+        
+        with patch.object(CompanyInvitation.objects, 'filter', side_effect=filter_then_accept):
+            self.assertEqual(cleanup_expired_invitations(), "Processed 2 expired invitations")
+        
+        accepted.refresh_from_db()
+        self.assertEqual(accepted.status, 'accepted')
+        self.assertEqual(CompanyInvitation.objects.filter(status='expired').count(), 2)
+
+    @override_settings(FRONTEND_URL='https://app.example.com')
+    def test_send_invitation_emails_bulk(self):
+        """Test bulk invitation emails go out in one batch"""
+        from django.core import mail
+        from .tasks import send_invitation_emails_bulk
+        
+        invitations = CompanyInvitation.objects.bulk_create([
+            CompanyInvitation(
+                company=self.company,
+                email=f"user{i}@example.com",
+                invited_by=self.inviter
+            )
+            for i in range(3)
+        ])
+        
+        with self.assertNumQueries(1):
+            send_invitation_emails_bulk([invitation.id for invitation in invitations])
+        
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["user0@example.com", "user1@example.com", "user2@example.com"]
+        )
+        first = next(m for m in mail.outbox if m.to == ["user0@example.com"])
+        self.assertIn(f"https://app.example.com/invite/{invitations[0].token}", first.body)
+
+    def test_send_invitation_emails_bulk_splits_large_batches(self):
+        """Test large bulk sends are re-queued as rate-limited chunks"""
+        from django.core import mail
+        from .tasks import send_invitation_emails_bulk
+        
+        ids = [str(i) for i in range(5)]
+        with patch('companies.tasks.BULK_EMAIL_CHUNK', 2), \
+             patch('companies.tasks.send_invitation_emails_bulk.delay') as mock_delay:
+            send_invitation_emails_bulk(ids)
+        
+        self.assertEqual(
+            [call.args[0] for call in mock_delay.call_args_list],
+            [['0', '1'], ['2', '3'], ['4']]
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(FRONTEND_URL='https://app.example.com')
+    def test_send_invitation_email_from_payload(self):
+        """Test a precomputed payload is sent without touching the database"""
+        from django.core import mail
+        from .tasks import send_invitation_email, invitation_email_payload
+        
+        invitation = CompanyInvitation.objects.create(
+            company=self.company,
+            email="payload@example.com",
+            invited_by=self.inviter
+        )
+        payload = invitation_email_payload(invitation)
+        
+        with self.assertNumQueries(0):
+            send_invitation_email(**payload)
+        
+        self.assertEqual(mail.outbox[0].to, ["payload@example.com"])
+        self.assertIn(payload['invite_url'], mail.outbox[0].body)
+        self.assertIn(payload['expires_str'], mail.outbox[0].body)
+
+    def test_send_mail_reconnects_after_disconnect(self):
+        """Test a dropped mail connection is replaced and the message resent"""
+        import smtplib
+        from . import tasks
+        
+        tasks._mail.connection = None
+        with patch('companies.tasks.send_mail',
+                   side_effect=[smtplib.SMTPServerDisconnected(), 1]) as mock_send:
+            self.assertEqual(tasks._send_mail("s", "m", "from@example.com", ["to@example.com"]), 1)
+        
+        self.assertEqual(mock_send.call_count, 2)
+        first, second = (call.kwargs['connection'] for call in mock_send.call_args_list)
+        self.assertIsNot(first, second)
+        self.assertIs(tasks._mail.connection, second)
+
 
 class CompanyAPITest(APITestCase):
     """Test Company API endpoints"""
 
-    def setUp(self):
-        self.client = APIClient()
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.user = User.objects.create_user(
+        cls.user = User.objects.create_user(
             username="testuser",
             email="test@example.com",
             password="testpass123",
-            company=self.company
+            company=cls.company
         )
         UserRole.objects.create(
-            user=self.user,
+            user=cls.user,
             role="owner",
             permissions={"can_manage_settings": True}
         )
         
-        # Authenticate user
-        refresh = RefreshToken.for_user(self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        # Signed once per class; tests only reattach the header
+        cls.auth_header = f'Bearer {RefreshToken.for_user(cls.user).access_token}'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth_header)
 
     def test_get_company_list(self):
         """Test getting company list"""
@@ -206,6 +355,33 @@ class CompanyAPITest(APITestCase):
         self.company.refresh_from_db()
         self.assertEqual(self.company.name, 'Updated Company Name')
 
+    def test_retrieve_counts_all_members(self):
+        """Test detail counts cover the whole company, not just the requesting member"""
+        from types import SimpleNamespace
+        from matrix_integration.models import BridgeConnection
+        from .serializers import CompanyDetailSerializer
+        from .views import CompanyViewSet
+        
+        for i in range(2):
+            User.objects.create_user(
+                username=f"member{i}", email=f"member{i}@example.com", company=self.company
+            )
+        BridgeConnection.objects.bulk_create([
+            BridgeConnection(company=self.company, platform='telegram', name='tg',
+                             bridge_key='tg_1', status='connected'),
+            BridgeConnection(company=self.company, platform='signal', name='sig',
+                             bridge_key='sig_1', status='pending'),
+        ])
+        
+        viewset = CompanyViewSet(request=SimpleNamespace(user=self.user), action='retrieve')
+        company = viewset.get_queryset().get(pk=self.company.pk)
+        
+        self.assertEqual(company.total_users_count, 3)
+        self.assertEqual(company.active_bridges_count, 1)
+        serializer = CompanyDetailSerializer()
+        self.assertEqual(serializer.get_total_users(company), 3)
+        self.assertEqual(serializer.get_active_bridges(company), 1)
+
     def test_company_multi_tenant_isolation(self):
         """Test that users can only see their own company"""
         # Create another company and user
@@ -238,7 +414,7 @@ class CompanyAPITest(APITestCase):
         self.assertTrue(response.data['ai_enabled'])
 
 
-class CompanyOnboardingTest(TestCase):
+class CompanyOnboardingTest(SimpleTestCase):
     """Test company onboarding process"""
 
     @patch('companies.tasks.send_welcome_email.delay')
@@ -268,27 +444,31 @@ class CompanyOnboardingTest(TestCase):
 class CompanyInvitationAPITest(APITestCase):
     """Test Company Invitation API"""
 
-    def setUp(self):
-        self.client = APIClient()
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
         )
-        self.user = User.objects.create_user(
+        cls.user = User.objects.create_user(
             username="testuser",
             email="test@example.com",
             password="testpass123",
-            company=self.company
+            company=cls.company
         )
         UserRole.objects.create(
-            user=self.user,
+            user=cls.user,
             role="admin",
             permissions={"can_manage_users": True}
         )
         
-        refresh = RefreshToken.for_user(self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        # Signed once per class; tests only reattach the header
+        cls.auth_header = f'Bearer {RefreshToken.for_user(cls.user).access_token}'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth_header)
 
     @patch('companies.tasks.send_invitation_email.delay')
     def test_send_invitation(self, mock_send_email):
@@ -342,8 +522,9 @@ class CompanyInvitationAPITest(APITestCase):
 class CompanyMetricsTest(TestCase):
     """Test company metrics and analytics"""
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name="Test Company",
             industry="technology",
             size="small"
@@ -366,6 +547,64 @@ class CompanyMetricsTest(TestCase):
         user_count = self.company.users.count()
         self.assertEqual(user_count, 2)
 
+    def test_company_stats(self):
+        """Test stats are computed in one query and cached"""
+        from django.core.cache import cache
+        from django.utils import timezone
+        from billing.models import UsageMetrics
+        from messaging.models import Conversation, Message
+        from .views import CompanyViewSet
+        
+        User.objects.create_user(username="active", email="active@example.com", company=self.company)
+        User.objects.create_user(
+            username="inactive", email="inactive@example.com", company=self.company, is_active=False
+        )
+        conversation = Conversation.objects.create(company=self.company, platform='telegram')
+        Message.objects.bulk_create([
+            Message(conversation=conversation, direction='incoming', content='hi', timestamp=timezone.now())
+            for _ in range(3)
+        ])
+        UsageMetrics.objects.create(company=self.company, date=timezone.now().date(), ai_requests_count=7)
+        
+        viewset = CompanyViewSet()
+        viewset.get_object = lambda: self.company
+        cache.clear()
+        
+        with self.assertNumQueries(1):
+            stats = viewset.stats(request=None).data
+        self.assertEqual(stats, {
+            'total_users': 2,
+            'active_users': 1,
+            'total_bridges': 0,
+            'active_bridges': 0,
+            'total_rooms': 0,
+            'messages_this_month': 3,
+            'ai_requests_this_month': 7,
+        })
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(viewset.stats(request=None).data, stats)
+
+    def test_update_company_stats(self):
+        """Test the stats task counts each relation independently in one query"""
+        from matrix_integration.models import BridgeConnection
+        from .tasks import update_company_stats
+        
+        for i in range(3):
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", company=self.company)
+        BridgeConnection.objects.bulk_create([
+            BridgeConnection(company=self.company, platform='telegram', name='tg',
+                             bridge_key='tg_1', status='connected'),
+            BridgeConnection(company=self.company, platform='signal', name='sig',
+                             bridge_key='sig_1', status='connected'),
+        ])
+        
+        with self.assertNumQueries(1), self.assertLogs('companies.tasks', 'INFO') as logs:
+            update_company_stats(self.company.id)
+        
+        # Subqueries per relation: no users x bridges join to DISTINCT over
+        self.assertIn("Test Company stats: 3 users, 2 bridges, 0 rooms", logs.output[0])
+
     def test_company_activity_tracking(self):
         """Test tracking company activity"""
         # This would test activity tracking functionality
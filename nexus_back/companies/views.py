@@ -3,13 +3,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Count, Q
-from django.core.mail import send_mail
-from django.conf import settings
-import secrets
+from django.core.cache import cache
+from django.db.models import Q, Sum
 import hashlib
 
 from .models import Company, CompanySettings, CompanyInvitation
+from .queries import company_aggregate
+from .tasks import send_invitation_email, invitation_email_payload
 from .serializers import (
     CompanySerializer, 
     CompanyDetailSerializer, 
@@ -19,6 +19,13 @@ from .serializers import (
 )
 from authentication.models import CustomUser
 from authentication.permissions import IsCompanyAdminOrReadOnly, IsCompanyMember
+from billing.models import UsageMetrics
+from matrix_integration.models import BridgeConnection, MatrixRoom
+from messaging.models import Message
+
+
+# Dashboards poll stats; a minute of staleness is fine for these counters
+STATS_CACHE_TIMEOUT = 60
 
 
 class CompanyViewSet(viewsets.ModelViewSet):
@@ -32,8 +39,20 @@ class CompanyViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
-            return Company.objects.all()
-        return Company.objects.filter(users=user)
+            queryset = Company.objects.all()
+        else:
+            queryset = Company.objects.filter(users=user)
+        if self.action == 'retrieve':
+            # Counts for CompanyDetailSerializer in the same query
+            # Subqueries, not Count('users'): that would reuse the users=user
+            # join above and only ever see the requesting user's row
+            queryset = queryset.annotate(
+                total_users_count=company_aggregate(CustomUser.objects.all()),
+                active_bridges_count=company_aggregate(
+                    BridgeConnection.objects.filter(status='connected')
+                )
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -112,17 +131,12 @@ class CompanyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create invitation
-        token = secrets.token_urlsafe(32)
-        expires_at = timezone.now() + timezone.timedelta(days=7)
-        
+        # Create invitation; token and expires_at come from the model defaults
         invitation = CompanyInvitation.objects.create(
             company=company,
             email=email,
             role=role,
-            invited_by=request.user,
-            token=token,
-            expires_at=expires_at
+            invited_by=request.user
         )
         
         # Send invitation email
@@ -198,53 +212,46 @@ class CompanyViewSet(viewsets.ModelViewSet):
     def stats(self, request, slug=None):
         """Get company statistics"""
         company = self.get_object()
-        
-        stats = {
-            'total_users': company.users.count(),
-            'active_users': company.users.filter(is_active=True).count(),
-            'total_bridges': company.bridges.count(),
-            'active_bridges': company.bridges.filter(status='connected').count(),
-            'total_rooms': company.matrix_rooms.count(),
-            'messages_this_month': company.messages.filter(
-                created_at__gte=timezone.now().replace(day=1)
-            ).count(),
-            'ai_requests_this_month': company.ai_requests.filter(
-                created_at__gte=timezone.now().replace(day=1)
-            ).count(),
-        }
+        month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        
+        cache_key = f'company:{company.pk}:stats:{month_start:%Y-%m}'
+        stats = cache.get(cache_key)
+        if stats is None:
+            users = CustomUser.objects.all()
+            bridges = BridgeConnection.objects.all()
+            # One SELECT of correlated subqueries: joining every relation in a
+            # single aggregate would multiply users x bridges x rooms x messages
+            stats = Company.objects.filter(pk=company.pk).annotate(
+                total_users=company_aggregate(users),
+                active_users=company_aggregate(users.filter(is_active=True)),
+                total_bridges=company_aggregate(bridges),
+                active_bridges=company_aggregate(bridges.filter(status='connected')),
+                total_rooms=company_aggregate(MatrixRoom.objects.all()),
+                messages_this_month=company_aggregate(
+                    Message.objects.filter(created_at__gte=month_start),
+                    company_path='conversation__company',
+                ),
+                ai_requests_this_month=company_aggregate(
+                    UsageMetrics.objects.filter(date__gte=month_start.date()),
+                    Sum('ai_requests_count'),
+                ),
+            ).values(
+                'total_users', 'active_users', 'total_bridges', 'active_bridges',
+                'total_rooms', 'messages_this_month', 'ai_requests_this_month',
+            ).get()
+            cache.set(cache_key, stats, STATS_CACHE_TIMEOUT)
         
         return Response(stats)
 
     def _send_invitation_email(self, invitation):
-        """Send invitation email to user"""
-        subject = f"Invitation to join {invitation.company.name}"
-        message = f"""
-        Hello,
-        
-        You've been invited to join {invitation.company.name} as a {invitation.role}.
-        
-        Click the link below to accept the invitation:
-        {settings.FRONTEND_URL}/invite/{invitation.token}
-        
-        This invitation will expire on {invitation.expires_at.strftime('%Y-%m-%d %H:%M UTC')}.
-        
-        Best regards,
-        The Nexus Team
-        """
-        
+        """Queue the invitation email with everything the worker needs precomputed"""
         try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [invitation.email],
-                fail_silently=False,
-            )
+            send_invitation_email.delay(**invitation_email_payload(invitation))
         except Exception as e:
             # Log the error but don't fail the invitation creation
             import logging
             logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send invitation email to {invitation.email}: {str(e)}")
+            logger.error(f"Failed to queue invitation email to {invitation.email}: {str(e)}")
 
 
 class CompanyInvitationViewSet(viewsets.ReadOnlyModelViewSet):
@@ -0,0 +1,63 @@
+"""
+Unit tests for the health check probes
+"""
+import json
+from unittest.mock import Mock, patch
+
+from django.test import RequestFactory, SimpleTestCase
+
+from . import views
+
+
+class CachedCheckTest(SimpleTestCase):
+    """Test probe results are reused for CHECK_TTL seconds"""
+
+    def setUp(self):
+        patcher = patch.dict(views._check_results, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('health_check.views.time.monotonic')
+    def test_result_reused_within_ttl(self, mock_monotonic):
+        """Test a second call inside CHECK_TTL doesn't rerun the probe"""
+        probe = Mock(return_value={'status': 'healthy'})
+
+        mock_monotonic.return_value = 100.0
+        views._cached_check('database', probe)
+        mock_monotonic.return_value = 100.0 + views.CHECK_TTL - 0.1
+        result = views._cached_check('database', probe)
+
+        self.assertEqual(result, {'status': 'healthy'})
+        probe.assert_called_once_with()
+
+    @patch('health_check.views.time.monotonic')
+    def test_probe_reruns_after_ttl(self, mock_monotonic):
+        """Test a call after CHECK_TTL runs the probe again"""
+        probe = Mock(side_effect=[
+            {'status': 'healthy'},
+            {'status': 'unhealthy', 'error': 'down'},
+        ])
+
+        mock_monotonic.return_value = 100.0
+        views._cached_check('redis', probe)
+        mock_monotonic.return_value = 100.0 + views.CHECK_TTL
+        result = views._cached_check('redis', probe)
+
+        self.assertEqual(result['status'], 'unhealthy')
+        self.assertEqual(probe.call_count, 2)
+
+    def test_unhealthy_check_marks_overall_status(self):
+        """Test one unhealthy probe makes the detailed status unhealthy"""
+        checks = (
+            ('database', Mock(return_value={'status': 'healthy'})),
+            ('redis', Mock(return_value={'status': 'unhealthy', 'error': 'Connection refused'})),
+        )
+        request = RequestFactory().get('/health/detailed/')
+
+        with patch.object(views, '_CHECKS', checks):
+            response = views.detailed_health_check(request)
+
+        data = json.loads(response.content)
+        self.assertEqual(data['status'], 'unhealthy')
+        self.assertEqual(data['checks']['database']['status'], 'healthy')
+        self.assertEqual(data['checks']['redis']['error'], 'Connection refused')
@@ -4,6 +4,7 @@ from django.core.cache import cache
 from django.conf import settings
 import redis
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -17,59 +18,84 @@ def health_check(request):
     })
 
 
-def detailed_health_check(request):
-    """Detailed health check with all services"""
-    health_status = {
-        'status': 'healthy',
-        'timestamp': request.META.get('REQUEST_TIME', 'unknown'),
-        'checks': {}
-    }
-    
-    # Database check
+# Pooled client shared across requests; connects lazily on the first ping.
+# Blocking pool waits briefly for a free connection instead of raising, and the
+# short timeouts make a stuck Redis fail the probe rather than stall the worker
+_redis = redis.Redis(connection_pool=redis.BlockingConnectionPool(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=0,
+    max_connections=4,
+    timeout=0.2,
+    socket_connect_timeout=0.2,
+    socket_timeout=0.2,
+))
+
+# Probes hit this every few seconds per pod; reuse a result for this long
+CHECK_TTL = 2.0
+
+# name -> (monotonic time, result); kept in-process so a down cache can't hide its own failure
+_check_results = {}
+
+
+def _check_database():
     try:
         with connection.cursor() as cursor:
             cursor.execute('SELECT 1')
-        health_status['checks']['database'] = {'status': 'healthy'}
+        return {'status': 'healthy'}
     except Exception as e:
-        health_status['checks']['database'] = {
-            'status': 'unhealthy',
-            'error': str(e)
-        }
-        health_status['status'] = 'unhealthy'
-    
-    # Redis check
+        return {'status': 'unhealthy', 'error': str(e)}
+
+
+def _check_redis():
     try:
-        redis_client = redis.Redis(
-            host=getattr(settings, 'REDIS_HOST', 'localhost'),
-            port=getattr(settings, 'REDIS_PORT', 6379),
-            db=0
-        )
-        redis_client.ping()
-        health_status['checks']['redis'] = {'status': 'healthy'}
+        _redis.ping()
+        return {'status': 'healthy'}
     except Exception as e:
-        health_status['checks']['redis'] = {
-            'status': 'unhealthy',
-            'error': str(e)
-        }
-        health_status['status'] = 'unhealthy'
-    
-    # Cache check
+        return {'status': 'unhealthy', 'error': str(e)}
+
+
+def _check_cache():
     try:
         cache.set('health_check_test', 'test_value', 30)
         test_value = cache.get('health_check_test')
         if test_value == 'test_value':
-            health_status['checks']['cache'] = {'status': 'healthy'}
-        else:
-            health_status['checks']['cache'] = {
-                'status': 'unhealthy',
-                'error': 'Cache value mismatch'
-            }
-            health_status['status'] = 'unhealthy'
+            return {'status': 'healthy'}
+        return {'status': 'unhealthy', 'error': 'Cache value mismatch'}
     except Exception as e:
-        health_status['checks']['cache'] = {
-            'status': 'unhealthy',
-            'error': str(e)
-        }
-        health_status['status'] = 'unhealthy'
+        return {'status': 'unhealthy', 'error': str(e)}
+
+
+_CHECKS = (
+    ('database', _check_database),
+    ('redis', _check_redis),
+    ('cache', _check_cache),
+)
+
+
+def _cached_check(name, probe):
+    """Run probe, or return its result if it ran less than CHECK_TTL seconds ago"""
+    now = time.monotonic()
+    hit = _check_results.get(name)
+    if hit is not None and now - hit[0] < CHECK_TTL:
+        return hit[1]
+    result = probe()
+    _check_results[name] = (now, result)
+    return result
+
+
+def detailed_health_check(request):
+    """Detailed health check with all services"""
+    health_status = {
+        'status': 'healthy',
+        'timestamp': request.META.get('REQUEST_TIME', 'unknown'),
+        'checks': {}
+    }
+    
+    for name, probe in _CHECKS:
+        result = _cached_check(name, probe)
+        health_status['checks'][name] = result
+        if result['status'] != 'healthy':
+            health_status['status'] = 'unhealthy'
     
     return JsonResponse(health_status)
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-14 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(models.F('metadata__purchase_count'), name='conv_pc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(models.F('metadata__days_since_last_purchase'), name='conv_dslp_idx'),
+        ),
+    ]
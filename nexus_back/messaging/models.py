@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 import uuid
 from django.contrib.auth import get_user_model
 
@@ -19,6 +20,11 @@ class Conversation(models.Model):
 
     class Meta:
         unique_together = ['company', 'external_id', 'platform']
+        indexes = [
+            # Campaign audience targeting filters on these metadata keys
+            models.Index(F('metadata__purchase_count'), name='conv_pc_idx'),
+            models.Index(F('metadata__days_since_last_purchase'), name='conv_dslp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.platform} - {self.external_id}"
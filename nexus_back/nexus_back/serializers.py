@@ -0,0 +1,16 @@
+"""
+Shared DRF serializer helpers
+"""
+import copy
+
+
+class CachedFieldsMixin:
+    """Build the ModelSerializer field map once per class, then hand out copies"""
+
+    def get_fields(self):
+        cls = type(self)
+        fields = cls.__dict__.get('_cached_fields')
+        if fields is None:
+            fields = super().get_fields()
+            cls._cached_fields = fields
+        return copy.deepcopy(fields)
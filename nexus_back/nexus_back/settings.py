@@ -126,6 +126,12 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Outbound mail gets its own queue so SMTP throttling can't starve other tasks
+CELERY_TASK_ROUTES = {
+    'companies.tasks.send_invitation_email': {'queue': 'mail'},
+    'companies.tasks.send_invitation_emails_bulk': {'queue': 'mail'},
+    'companies.tasks.send_welcome_email': {'queue': 'mail'},
+}
 
 # REST Framework configuration
 REST_FRAMEWORK = {
@@ -140,10 +146,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'nexus_back.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'nexus_back.parsers.ORJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
@@ -163,6 +169,9 @@ SIMPLE_JWT = {
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
 
+# Frontend base URL used in email links
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
+
 # Matrix Configuration
 MATRIX_HOMESERVER = os.environ.get('MATRIX_HOMESERVER', 'http://localhost:8008')
 MATRIX_SERVER_NAME = os.environ.get('MATRIX_SERVER_NAME', 'matrix.nexus.local')
@@ -178,6 +187,8 @@ WHATSAPP_VERIFY_TOKEN = os.environ.get('WHATSAPP_VERIFY_TOKEN')
 WHATSAPP_ACCESS_TOKEN = os.environ.get('WHATSAPP_ACCESS_TOKEN')
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
 INSTAGRAM_ACCESS_TOKEN = os.environ.get('INSTAGRAM_ACCESS_TOKEN')
+# signal-cli daemon socket (signal-cli daemon --socket <path>)
+SIGNAL_CLI_SOCKET = os.environ.get('SIGNAL_CLI_SOCKET')
 
 # AI Configuration
 GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY', '')
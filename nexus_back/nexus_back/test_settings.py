@@ -0,0 +1,30 @@
+"""
+Настройки для запуска тестов (manage.py test)
+"""
+from .settings import *
+
+# База в памяти: без файла на диске и без fsync на каждый коммит
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+
+class DisableMigrations:
+    """Таблицы создаются напрямую по моделям, без прогона всех миграций"""
+
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+MIGRATION_MODULES = DisableMigrations()
+
+# Быстрый хешер: PBKDF2 с сотнями тысяч итераций — самая дорогая часть create_user в тестах
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]